@@ -0,0 +1,165 @@
+"""
+benchmark suite of the compute hot paths (workloads in benchmarks/workloads.py)
+
+    python -m benchmarks.run [-k NAME] [--quick] [--save-baseline] [--compare]
+
+Every run is appended to the history (benchmarks/history.jsonl, one JSON run per line).
+--save-baseline also saves it as the baseline (benchmarks/baseline.json), --compare compares the
+median times with the baseline and exits with 1 if one is slower by more than --tolerance
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+from benchmarks.workloads import BENCHMARKS
+
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+HISTORY = os.path.join(FOLDER, "history.jsonl")
+BASELINE = os.path.join(FOLDER, "baseline.json")
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_call(func, min_time: float = 1.0, max_repeat: int = 10) -> dict:
+    """
+    time func: a first call, then repeats until min_time seconds or max_repeat calls.
+    The first call is a sample only if it already takes min_time
+    """
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    times = []
+    if first >= min_time:
+        times.append(first)
+    while len(times) < max_repeat and sum(times) + first < min_time:
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "first": first,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "repeats": len(times),
+    }
+
+
+def run(names: list, quick: bool = False, min_time: float = 1.0) -> dict:
+    """run the benchmarks names, return the run {"time", "commit", "machine", ..., "results"}"""
+    results = []
+    for name in names:
+        func, sizes, quick_sizes = BENCHMARKS[name]
+        for size in quick_sizes if quick else sizes:
+            rets = time_call(func(size), min_time)
+            results.append({"name": name, "size": size, **rets})
+            label = name if size is None else f"{name}[{size}]"
+            print(
+                f"{label:36s} {rets['median'] * 1e3:12.3f} ms  ({rets['repeats']} repeats)",
+                flush=True,
+            )
+    return {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "quick": quick,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """
+    compare the median times of current with those of baseline
+
+    return: [(name, size, baseline median, current median, ratio, regressed)] of the common benchmarks
+    """
+    base = {(r["name"], r["size"]): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        b = base.get((r["name"], r["size"]))
+        if b is not None:
+            ratio = r["median"] / b["median"]
+            rows.append(
+                (
+                    r["name"],
+                    r["size"],
+                    b["median"],
+                    r["median"],
+                    ratio,
+                    ratio > 1 + tolerance,
+                )
+            )
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run", description="benchmark suite"
+    )
+    parser.add_argument(
+        "-k", action="append", help="run the benchmarks whose name contains K"
+    )
+    parser.add_argument("--list", action="store_true", help="list the benchmarks")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds per size")
+    parser.add_argument("--history", default=HISTORY)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--compare", action="store_true", help="compare with the baseline"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    names = [n for n in BENCHMARKS if not args.k or any(k in n for k in args.k)]
+    if args.list:
+        for name in names:
+            func, sizes, quick_sizes = BENCHMARKS[name]
+            print(name, list(sizes), "quick", list(quick_sizes))
+        return 0
+
+    current = run(names, args.quick, args.min_time)
+    with open(args.history, "a") as f:
+        f.write(json.dumps(current) + "\n")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=1)
+    if not args.compare:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print(f"\ncompared with the baseline of {baseline['time']} ({baseline['commit']})")
+    rows = compare(current, baseline, args.tolerance)
+    for name, size, b, c, ratio, regressed in rows:
+        label = name if size is None else f"{name}[{size}]"
+        flag = (
+            "  SLOWER"
+            if regressed
+            else ("  faster" if ratio < 1 - args.tolerance else "")
+        )
+        print(f"{label:36s} {b * 1e3:12.3f} -> {c * 1e3:12.3f} ms  x{ratio:.2f}{flag}")
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+workloads of the benchmark suite (python -m benchmarks.run), with fixed seeds.
+Each benchmark(size) prepares its data and returns the callable to time.
+The full sizes go up to 1e4 samples and 10k beams (minutes on one core), --quick runs the small ones
+"""
+
+import numpy as np
+import pandas as pd
+from model.r_ai_n import Conc_AI, AI_Calculate
+from model.r_ai_table import AI_MaxTable
+from model.r_regression import _genMonteCarlo, fit2A, fit2C
+from model.bcd_mcft.r_mdl_bcdMCFT import *
+from model.bcd_mcft.r_test_data import process_data
+from model.bcd_mcft.r_eng_support import cubic_max_root, polynomial_eq
+
+SEED = 2024
+SAMPLE_CSV = "data/data_sample_u8.csv"
+
+# {name: (function of size, sizes, sizes of --quick)}
+BENCHMARKS = {}
+
+
+def benchmark(name: str, sizes=(None,), quick=None):
+    """register a workload under name, run for each of sizes (quick with --quick)"""
+
+    def register(func):
+        BENCHMARKS[name] = (
+            func,
+            tuple(sizes),
+            tuple(sizes if quick is None else quick),
+        )
+        return func
+
+    return register
+
+
+def _samples(n: int) -> dict:
+    """n random (fc, ag, pv, w) in the ranges of the Monte Carlo fits"""
+    rng = np.random.default_rng(SEED)
+    return {
+        "fc": rng.uniform(20, 180, n),
+        "ag": rng.uniform(16, 32, n),
+        "pv": rng.uniform(0.1, 1, n),
+        "w": rng.uniform(0.01, 1.6, n),
+    }
+
+
+def _beams(n: int) -> pd.DataFrame:
+    """the sample beams replicated up to n rows"""
+    df = pd.read_csv(SAMPLE_CSV)
+    return pd.concat([df] * -(-n // len(df)), ignore_index=True).head(n)
+
+
+def _cubics(n: int) -> np.ndarray:
+    """n cubics (4, n) of n_theta_e1 (k3, k2, -sqrt(500), k0) for random beams and angles"""
+    rng = np.random.default_rng(SEED)
+    f, g, h = rng.uniform(20, 80, n), rng.uniform(0.5, 2, n), rng.uniform(0, 1, n)
+    sx, theta = rng.uniform(200, 1000, n), rng.uniform(0.3, 1.2, n)
+    sx_sin, tanth = sx / np.sin(theta), np.tan(theta)
+    return np.array(
+        [
+            np.sqrt(500) * h * sx_sin,
+            (h + 44 / f / tanth) * sx_sin,
+            np.full(n, -np.sqrt(500)),
+            0.568 * g / tanth - 1,
+        ]
+    )
+
+
+@benchmark("calStresses_all")
+def calStresses_all(size):
+    conc = Conc_AI()
+    return lambda: conc.calStresses_all(w=0.4, delta=0.3)
+
+
+@benchmark("calStress_w_delta_15x20")
+def calStress_w_delta(size):
+    conc = Conc_AI()
+    ws = np.linspace(0.1, 1.6, 15)
+    deltas = np.linspace(0, 2, 20)
+    return lambda: AI_Calculate.calStress_w_delta(conc=conc, ws=ws, deltas=deltas)
+
+
+@benchmark("calStress_grid_15x20")
+def calStress_grid(size):
+    conc = Conc_AI()
+    ws = np.linspace(0.1, 1.6, 15)
+    deltas = np.linspace(0, 2, 20)
+    return lambda: AI_Calculate.calStress_grid(conc, ws, deltas)
+
+
+@benchmark("calMaxStresses_all", sizes=(100, 10000), quick=(20,))
+def calMaxStresses_all(size):
+    conc = Conc_AI()
+    s = _samples(size)
+
+    def run():
+        for i in range(size):
+            conc.fc, conc.ag, conc.pv = s["fc"][i], s["ag"][i], s["pv"][i]
+            conc.calMaxStresses_all(w=s["w"][i])
+
+    return run
+
+
+@benchmark("calMaxStresses_all_np", sizes=(10000,))
+def calMaxStresses_all_np(size):
+    conc = Conc_AI()
+    s = _samples(size)
+    return lambda: conc.calMaxStresses_all_np(
+        w=s["w"], ag=s["ag"], pv=s["pv"], fc=s["fc"]
+    )
+
+
+@benchmark("genMonteCarlo", sizes=(100, 400), quick=(100,))
+def genMonteCarlo(size):
+    conc = Conc_AI()
+    return lambda: _genMonteCarlo(conc, ntimes=1, nsets=size, cache=False)
+
+
+@benchmark("genMonteCarlo_table", sizes=(1000, 10000, 100000), quick=(1000,))
+def genMonteCarlo_table(size):
+    conc = Conc_AI()
+    table = AI_MaxTable.build(
+        conc,
+        {
+            "fc": (20, 180, 9),
+            "ag": (16, 32, 5),
+            "pv": (0.1, 1, 2),
+            "w": (0.01, 1.6, 33),
+        },
+    )
+    return lambda: _genMonteCarlo(conc, ntimes=1, nsets=size, table=table, cache=False)
+
+
+@benchmark("fit2C", sizes=(200,), quick=(50,))
+def bench_fit2C(size):
+    conc = Conc_AI()
+    return lambda: fit2C(conc, ntimes=1, nsets=size, cache=False)
+
+
+@benchmark("fit2A", sizes=(100,), quick=(10,))
+def bench_fit2A(size):
+    conc = Conc_AI()
+    return lambda: fit2A(conc, ntimes=1, nsets=size, cache=False)
+
+
+@benchmark("getShearStrength_F")
+def getShearStrength_F(size):
+    r = pd.read_csv(SAMPLE_CSV).iloc[0]
+    geo = Geometry(r.a, r.b, r.d)
+    mat = Material(r.fc, r.Es, r.s_ratio, r.ag, r.Ec)
+    models = (
+        Mdl_bcdMCFT(geo, mat, FactorSetting(), BCD_RunSetting()),
+        NMdl_bcdMCFT(geo, mat, FactorSetting(), NBCD_RunSetting(pv=r.pv)),
+    )
+    return lambda: [m.getShearStrength_F() for m in models]
+
+
+@benchmark("process_data", sizes=(41, 1000, 10000), quick=(41,))
+def bench_process_data(size):
+    df = _beams(size)
+    return lambda: process_data(df)
+
+
+@benchmark("process_data_batch", sizes=(41, 1000, 10000), quick=(41, 1000))
+def process_data_batch(size):
+    df = _beams(size)
+    return lambda: process_data(df, batch=True)
+
+
+@benchmark("cubic_max_root", sizes=(10000,))
+def bench_cubic_max_root(size):
+    k = _cubics(size)
+    return lambda: cubic_max_root(*k)
+
+
+@benchmark("cubic_max_root_scalar", sizes=(1000,))
+def bench_cubic_max_root_scalar(size):
+    k = _cubics(size).T.tolist()
+    return lambda: [cubic_max_root(*row) for row in k]
+
+
+@benchmark("cubic_np_roots", sizes=(1000,))
+def bench_cubic_np_roots(size):
+    k = _cubics(size).T.tolist()
+    return lambda: [polynomial_eq(row)[-1] for row in k]
@@ -0,0 +1,299 @@
+"""
+command line runner of the features of the app, without Streamlit
+
+    python -m cli <command> [options]        (python -m cli <command> -h for its options)
+    python -m cli fit-c --config run.toml --out fit_c.csv --workers 4 --profile
+
+commands: stress, sweep-ag, sweep-ag-pv, fit-c, fit-a, test-mc, predict
+
+The options can also be given in a JSON or TOML file (--config) under their names, e.g.
+    ws = "0.1:1.6:15"
+    fcr = [20, 180]
+    [conc]
+    fc = 60
+the options of the command line win over those of the file. Values are lists "0.1,0.2,0.4" or
+linspaces "min:max:n", ranges are "min,max". Results go to --out (.csv or .parquet), or to stdout as CSV
+"""
+
+import argparse
+import cProfile
+import dataclasses
+import json
+import os
+import pstats
+import sys
+import tomllib
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import numpy as np
+import pandas as pd
+from model.r_ai_n import Conc_AI, AI_Calculate
+from model.r_ai_sweep import SWEEP_ENGINES, sweep_max_ag, sweep_max_ag_pv
+from model.r_regression import SAMPLERS, fit2A, fit2C, test_MonteCarlo
+from model.bcd_mcft.r_test_data import process_data
+
+
+def _values(v) -> np.ndarray:
+    """values from "a,b,c", "min:max:n" or a list"""
+    if isinstance(v, str):
+        if ":" in v:
+            lo, hi, n = v.split(":")
+            return np.linspace(float(lo), float(hi), int(n), endpoint=True)
+        v = v.split(",")
+    return np.asarray(v, dtype=np.float64).ravel()
+
+
+def _range(v) -> tuple:
+    """(min, max) from "min,max" or a list"""
+    v = _values(v)
+    if len(v) != 2:
+        raise ValueError(f"a range needs 2 values: {v.tolist()}")
+    return tuple(v.tolist())
+
+
+def _conc(items) -> Conc_AI:
+    """Conc_AI from {name: value} of the config and "name=value" of --conc"""
+    params = {}
+    for item in items:
+        if isinstance(item, dict):
+            params.update(item)
+        else:
+            name, _, value = item.partition("=")
+            params[name] = float(value)
+    # the types of the annotations, the defaults of float parameters may be ints (ag = 20)
+    types = {f.name: f.type for f in dataclasses.fields(Conc_AI)}
+    unknown = set(params) - set(types)
+    if unknown:
+        raise ValueError(f"unknown parameters of Conc_AI: {sorted(unknown)}")
+    return Conc_AI(**{k: types[k](v) for k, v in params.items()})
+
+
+def _kwargs(args, names: dict) -> dict:
+    """{name: convert(value)} of the options given, the defaults of the called function are kept otherwise"""
+    values = ((name, getattr(args, name)) for name in names)
+    return {name: names[name](v) for name, v in values if v is not None}
+
+
+def _load_config(path: str) -> dict:
+    """options from a JSON or TOML file"""
+    if path.endswith(".toml"):
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write(df: pd.DataFrame, out: str):
+    """write df to out (.parquet or .csv), or to stdout as CSV"""
+    if out is None:
+        df.to_csv(sys.stdout, index=False)
+    elif out.endswith(".parquet"):
+        df.to_parquet(out, index=False)
+    else:
+        df.to_csv(out, index=False)
+
+
+def _log(*args):
+    print(*args, file=sys.stderr)
+
+
+def cmd_stress(args, conc: Conc_AI) -> pd.DataFrame:
+    """AI_Calculate.calStress_w_delta: stresses on ws x deltas"""
+    return AI_Calculate.calStress_w_delta(
+        conc=conc, ws=_values(args.ws), deltas=_values(args.deltas)
+    )
+
+
+def cmd_sweep_ag(args, conc: Conc_AI) -> pd.DataFrame:
+    """sweep_max_ag: max stresses on ags x ws (pg000_f02)"""
+    return sweep_max_ag(conc, _values(args.ags), _values(args.ws), args.engine)
+
+
+def cmd_sweep_ag_pv(args, conc: Conc_AI) -> pd.DataFrame:
+    """sweep_max_ag_pv: max shear stresses on ags x pvs x ws (pg000_f03)"""
+    return sweep_max_ag_pv(
+        conc, _values(args.ags), _values(args.pvs), _values(args.ws), args.engine
+    )
+
+
+# options of the Monte Carlo datasets of fit-c, fit-a and test-mc, with their conversions
+_MC_OPTIONS = {
+    "fcr": _range,
+    "wr": _range,
+    "agr": _range,
+    "pvr": _range,
+    "ntimes": int,
+    "nsets": int,
+    "seed_code": int,
+    "workers": int,
+    "sampler": str,
+}
+
+
+def cmd_fit_c(args, conc: Conc_AI) -> pd.DataFrame:
+    """fit2C: parameter C"""
+    kwargs = _kwargs(args, {**_MC_OPTIONS, "chunk_size": int})
+    C, mape, smape, r2 = fit2C(conc, cache=args.cache, **kwargs)
+    return pd.DataFrame([{"C": C, "mape": mape, "smape": smape, "r2": r2}])
+
+
+def cmd_fit_a(args, conc: Conc_AI) -> pd.DataFrame:
+    """fit2A: parameter A for a given C, and the metrics of A = 8"""
+    kwargs = _kwargs(args, {**_MC_OPTIONS, "chunk_size": int, "C": float})
+    rets = fit2A(conc, cache=args.cache, **kwargs)
+    names = ("A", "mape", "smape", "r2", "mape8", "smape8", "r2_8")
+    return pd.DataFrame([dict(zip(names, rets))])
+
+
+def cmd_test_mc(args, conc: Conc_AI) -> pd.DataFrame:
+    """test_MonteCarlo: metrics of (A, C), the figures are saved in --fig-dir if given"""
+    kwargs = _kwargs(args, {**_MC_OPTIONS, "C": float, "A": float})
+    mape, smape, r2, fig_test, fig2 = test_MonteCarlo(conc, cache=args.cache, **kwargs)
+    if args.fig_dir is not None:
+        os.makedirs(args.fig_dir, exist_ok=True)
+        fig_test.savefig(os.path.join(args.fig_dir, "test_MonteCarlo.png"))
+        fig2.savefig(os.path.join(args.fig_dir, "test_MonteCarlo_2.png"))
+    return pd.DataFrame([{"mape": mape, "smape": smape, "r2": r2}])
+
+
+def cmd_predict(args, conc: Conc_AI) -> pd.DataFrame:
+    """process_data: shear strength of the beams of --input (models m0, m1, m2)"""
+    kwargs = _kwargs(
+        args,
+        {
+            "fA": float,
+            "fB": float,
+            "gC": float,
+            "hE": float,
+            "workers": int,
+            "chunksize": int,
+        },
+    )
+    df = pd.read_csv(args.input)
+    df = process_data(df, batch=args.batch, warm_start=args.warm_start, **kwargs)
+    report = df.attrs.get("process_data")
+    if report is not None:
+        failed = sum(len(c["failed"]) for c in report["chunks"])
+        _log(f"process_data: {report['seconds']:.2f} s, {failed} failed rows")
+    return df
+
+
+def _parser():
+    """the parser, and its subparsers {command: parser}"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", help="JSON or TOML file of options")
+    common.add_argument("--out", help="output file, .csv or .parquet (default stdout)")
+    common.add_argument(
+        "--conc",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="parameter of Conc_AI, repeatable",
+    )
+    common.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help="profile the run, stats to PATH (pstats) or to stderr",
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="python -m cli", description="run the features of the app headless"
+    )
+    subs = parser.add_subparsers(dest="command", required=True)
+
+    sub = subs.add_parser("stress", parents=[common], help=cmd_stress.__doc__)
+    sub.add_argument("--ws", default="0.1:1.6:15")
+    sub.add_argument("--deltas", default="0:2:20")
+    sub.set_defaults(func=cmd_stress)
+
+    for name, func, defaults in (
+        ("sweep-ag", cmd_sweep_ag, {"ws": "0.01:4:100"}),
+        ("sweep-ag-pv", cmd_sweep_ag_pv, {"ws": "0.01:1.6:100"}),
+    ):
+        sub = subs.add_parser(name, parents=[common], help=func.__doc__)
+        sub.add_argument("--ags", default="10,16,20,32")
+        if name == "sweep-ag-pv":
+            sub.add_argument("--pvs", default="0.3,0.6,1")
+        sub.add_argument("--ws", default=defaults["ws"])
+        sub.add_argument("--engine", choices=SWEEP_ENGINES, default="exact")
+        sub.set_defaults(func=func)
+
+    for name, func in (
+        ("fit-c", cmd_fit_c),
+        ("fit-a", cmd_fit_a),
+        ("test-mc", cmd_test_mc),
+    ):
+        sub = subs.add_parser(name, parents=[common], help=func.__doc__)
+        for option in ("fcr", "wr", "agr", "pvr"):
+            sub.add_argument(f"--{option}", metavar="MIN,MAX")
+        sub.add_argument("--ntimes", type=int)
+        sub.add_argument("--nsets", type=int)
+        sub.add_argument("--seed-code", type=int)
+        sub.add_argument("--workers", type=int)
+        sub.add_argument("--sampler", choices=SAMPLERS)
+        sub.add_argument(
+            "--cache",
+            action="store_true",
+            help="reuse the datasets from the disk cache (BCD_CACHE_DIR, BCD_CACHE_MAX_MB)",
+        )
+        if name != "test-mc":
+            sub.add_argument("--chunk-size", type=int)
+        if name != "fit-c":
+            sub.add_argument("-C", dest="C", type=float)
+        if name == "test-mc":
+            sub.add_argument("-A", dest="A", type=float)
+            sub.add_argument("--fig-dir", help="folder to save the figures into")
+        sub.set_defaults(func=func)
+
+    sub = subs.add_parser("predict", parents=[common], help=cmd_predict.__doc__)
+    sub.add_argument("--input", default="data/data_sample_u8.csv", help="CSV of beams")
+    for option in ("fA", "fB", "gC", "hE"):
+        sub.add_argument(f"--{option}", type=float)
+    sub.add_argument("--workers", type=int)
+    sub.add_argument("--chunksize", type=int)
+    sub.add_argument("--batch", action="store_true", help="batched solvers")
+    sub.add_argument("--warm-start", action="store_true")
+    sub.set_defaults(func=cmd_predict)
+    return parser, subs.choices
+
+
+def main(argv=None) -> int:
+    parser, commands = _parser()
+    args = parser.parse_args(argv)
+    if args.config is not None:
+        # the options of the file become the defaults of the command
+        config = _load_config(args.config)
+        unknown = set(config) - set(vars(args))
+        if unknown:
+            parser.error(f"unknown options in {args.config}: {sorted(unknown)}")
+        if "conc" in config:
+            config["conc"] = [config["conc"]]
+        commands[args.command].set_defaults(**config)
+        args = parser.parse_args(argv)
+
+    try:
+        conc = _conc(args.conc)
+        profiler = cProfile.Profile() if args.profile else None
+        if profiler is not None:
+            profiler.enable()
+        df = args.func(args, conc)
+        if profiler is not None:
+            profiler.disable()
+            if args.profile == "-":
+                pstats.Stats(profiler, stream=sys.stderr).sort_stats(
+                    "cumulative"
+                ).print_stats(25)
+            else:
+                profiler.dump_stats(args.profile)
+        _write(df, args.out)
+    except (ValueError, OSError, ImportError) as e:
+        _log(f"error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
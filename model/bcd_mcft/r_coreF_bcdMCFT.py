@@ -1,5 +1,7 @@
 import math
 import inspect
+from dataclasses import dataclass
+import numpy as np
 from model.bcd_mcft.r_eng_support import *
 from model.bcd_mcft.r_beam import *
 
@@ -8,6 +10,43 @@ from model.bcd_mcft.r_beam import *
 class Const:
     EPS_TOR = 0.001
     RELATIVE_STEP_E1 = 0.01
+    # for the bracketed solvers of e1
+    MAX_ITER_E1 = 100
+    BRACKET_FACTOR_E1 = 10
+    # for the bracketed solver of ex (solve_batch), beyond which e1 may have no solution
+    BRACKET_FACTOR_EX = 2
+    # for the stepping solvers of e1 (ex2all, n_ex2all, each loop), which take up to ~300 and ~20 steps
+    MAX_STEPS_E1 = 1000
+
+
+class SolverError(Exception):
+    """
+    failure of a solver, with its reason: "max_iter", "time_budget", "no_bracket" or "math_error",
+    and where it happened
+    """
+
+    def __init__(self, reason: str, where: str = ""):
+        super().__init__(f"{where}: {reason}" if where else reason)
+        self.reason = reason
+        self.where = where
+
+
+@dataclass
+class SolveStats:
+    """iteration counts of the solvers: of ex (outer loop) and of e1 (inner loops, summed),
+    and the last residual of ex"""
+
+    n_ex: int = 0
+    n_e1: int = 0
+    residual: float = math.nan
+
+
+def _start_e1(ex: float, init_e1: float = None) -> float:
+    """the first e1 of the e1 solvers: init_e1 if given and above ex + step, else ex + step"""
+    st_e1 = ex + Const.RELATIVE_STEP_E1 * ex
+    if init_e1 is not None and init_e1 > st_e1:
+        return init_e1
+    return st_e1
 
 
 def get_beta(e1: float, theta: float):
@@ -28,9 +67,7 @@ def e1_theta(ex: float, e1: float):
         theta = math.atan(1 / math.sqrt(t))
         return theta
     except Exception as e:
-        raise Exception("e1_theta")
-        # print(f"Exception with {inspect.stack()[0][3]}: {e}")
-        # print(f"temp rets: ex={ex}, e1={e1}")
+        raise SolverError("math_error", "e1_theta") from e
 
 
 def gen_e1theta_func(ex: float, func):
@@ -72,18 +109,23 @@ def e23_smallleft(g: float, sxe: float, e1: float, theta: float):
         return 1, l, r
 
 
-def ex2all(g: float, sxe: float, ex: float):
+def ex2all(
+    g: float, sxe: float, ex: float, init_e1: float = None, stats: SolveStats = None
+):
     """
     given g, sxe, and a specific ex, make the loop to get (e1, theta)
+    >> init_e1: the first e1 (warm start), stats: counts the iterations
     """
     # get the initial value for e1
     step = Const.RELATIVE_STEP_E1 * ex
-    st_e1 = ex + step
+    st_e1 = _start_e1(ex, init_e1)
     o_e1 = st_e1
     theta = e1_theta(ex, o_e1)
     old_compa, l, r = e23_smallleft(g, sxe, o_e1, theta)
     # looping
-    while True:
+    for i in range(Const.MAX_STEPS_E1):
+        if stats is not None:
+            stats.n_e1 += 1
         o_e1 += old_compa * step
         theta = e1_theta(ex, o_e1)
         new_compa, l, r = e23_smallleft(g, sxe, o_e1, theta)
@@ -93,6 +135,8 @@ def ex2all(g: float, sxe: float, ex: float):
             if diff < Const.EPS_TOR:
                 break
         old_compa = new_compa
+    else:
+        raise SolverError("max_iter", "ex2all")
 
     # get the results
     e1 = o_e1
@@ -100,11 +144,134 @@ def ex2all(g: float, sxe: float, ex: float):
     return e1, theta, beta
 
 
+# BRACKETED SOLVERS OF EQ. 23 (Illinois method)
+# e1 is searched as u = log(e1 - ex) on the residual log(l/r) of e23_smallleft, which is positive
+# near e1 = ex and negative for large e1. The stop criterion is that of ex2all: |l-r|/min(l,r) < EPS_TOR
+
+
+def _e23_log_ratio(g: float, sxe: float, ex: float, u: float):
+    """return log(l/r) of e23_smallleft at e1 = ex + exp(u), with e1 and theta"""
+    e1 = ex + math.exp(u)
+    theta = e1_theta(ex, e1)
+    l = (1 + math.sqrt(500 * e1)) * math.tan(theta)
+    r = 0.568 * g + 1.258 * sxe * e1 / math.sin(theta)
+    return math.log(l / r), e1, theta
+
+
+def ex2all_illinois(
+    g: float, sxe: float, ex: float, init_e1: float = None, stats: SolveStats = None
+):
+    """
+    same as ex2all, with a bracketed Illinois (modified regula falsi) solver
+    """
+    try:
+        # bracket the root, starting from the first e1 of ex2all
+        last = math.log(_start_e1(ex, init_e1) - ex)
+        f_last, e1, theta = _e23_log_ratio(g, sxe, ex, last)
+        if math.expm1(math.fabs(f_last)) < Const.EPS_TOR:
+            return e1, theta, get_beta(e1, theta)
+        up = f_last > 0
+        d = math.log(Const.BRACKET_FACTOR_E1) * (1 if up else -1)
+        for i in range(Const.MAX_ITER_E1):
+            if stats is not None:
+                stats.n_e1 += 1
+            u = last + d
+            f, e1, theta = _e23_log_ratio(g, sxe, ex, u)
+            if math.expm1(math.fabs(f)) < Const.EPS_TOR:
+                return e1, theta, get_beta(e1, theta)
+            if (f > 0) != up:
+                break
+            last, f_last = u, f
+        else:
+            raise SolverError("no_bracket", "ex2all_illinois")
+        if up:
+            ua, fa, ub, fb = last, f_last, u, f
+        else:
+            ua, fa, ub, fb = u, f, last, f_last
+
+        # ua: l > r, ub: l < r
+        side = 0
+        for i in range(Const.MAX_ITER_E1):
+            if stats is not None:
+                stats.n_e1 += 1
+            u = (ua * fb - ub * fa) / (fb - fa)
+            f, e1, theta = _e23_log_ratio(g, sxe, ex, u)
+            if math.expm1(math.fabs(f)) < Const.EPS_TOR:
+                return e1, theta, get_beta(e1, theta)
+            if f > 0:
+                ua, fa = u, f
+                if side > 0:
+                    fb = fb / 2
+                side = 1
+            else:
+                ub, fb = u, f
+                if side < 0:
+                    fa = fa / 2
+                side = -1
+        raise SolverError("max_iter", "ex2all_illinois")
+    except (ArithmeticError, ValueError) as e:
+        raise SolverError("math_error", "ex2all_illinois") from e
+
+
+def e1_theta_np(ex, e1):
+    """vectorized e1_theta, for e1 > ex"""
+    a = 1 / (15000 * (1 + np.sqrt(500 * e1)))
+    # the larger root of a.t^2 + ex.t + (ex - e1) = 0, written without cancellation
+    t = 2 * (e1 - ex) / (ex + np.sqrt(ex * ex + 4 * a * (e1 - ex)))
+    return np.arctan(1 / np.sqrt(t))
+
+
+def get_beta_np(e1, theta):
+    """vectorized get_beta"""
+    return 0.33 / np.tan(theta) / (1 + np.sqrt(500 * e1))
+
+
+def _e23_log_ratio_np(g, sxe, ex, u):
+    """vectorized _e23_log_ratio"""
+    e1 = ex + np.exp(u)
+    theta = e1_theta_np(ex, e1)
+    l = (1 + np.sqrt(500 * e1)) * np.tan(theta)
+    r = 0.568 * g + 1.258 * sxe * e1 / np.sin(theta)
+    return np.log(l / r), e1, theta
+
+
+def _broadcast_ravel(*args):
+    """broadcast args to float64 arrays, return their shape and the raveled arrays"""
+    args = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in args])
+    return args[0].shape, [v.ravel() for v in args]
+
+
+def ex2all_batch(g, sxe, ex):
+    """
+    ex2all_illinois for broadcastable arrays of g, sxe, ex, solved together.
+    The points without convergence in MAX_ITER_E1 iterations are nan
+
+    return: e1, theta, beta as arrays
+    """
+    shape, (g, sxe, ex) = _broadcast_ravel(g, sxe, ex)
+
+    def func(idx, u):
+        f = _e23_log_ratio_np(g[idx], sxe[idx], ex[idx], u)[0]
+        return f, np.expm1(np.abs(f)) < Const.EPS_TOR
+
+    with np.errstate(all="ignore"):
+        u = illinois_np(
+            func,
+            np.log(Const.RELATIVE_STEP_E1 * ex),
+            math.log(Const.BRACKET_FACTOR_E1),
+            Const.MAX_ITER_E1,
+        )
+        f, e1, theta = _e23_log_ratio_np(g, sxe, ex, u)
+        beta = get_beta_np(e1, theta)
+    return e1.reshape(shape), theta.reshape(shape), beta.reshape(shape)
+
+
 # FOR NEW ID ACCORDING TO EQ. 23_n
 
 
 def n_theta_e1(f: float, g: float, h: float, sx: float, theta: float):
     # according Eq.23_n - BCD and MCFT
+    # not on the solver path: n_ex2all steps e1 with theta = e1_theta(ex, e1) instead
     try:
         sqrt500 = math.sqrt(500)
         sx_sin = sx / math.sin(theta)
@@ -114,16 +281,27 @@ def n_theta_e1(f: float, g: float, h: float, sx: float, theta: float):
         k2 = (h + 44 / f / tanth) * sx_sin
         k1 = -sqrt500
         k0 = 0.568 * g / tanth - 1
-        l = polynomial_eq([k3, k2, k1, k0])
-        t = max(l)
+        t = cubic_max_root(k3, k2, k1, k0)
+        if math.isnan(t):
+            raise ValueError("no real root")
         e1 = t * t
         return e1
 
     except Exception as e:
-        # print(f"Exception with {inspect.stack()[0][3]}: {e}")
         raise Exception("n1_theta_e1")
 
 
+def n_theta_e1_np(f, g, h, sx, theta):
+    """vectorized n_theta_e1, nan where Eq.23_n has no real root"""
+    sx_sin = sx / np.sin(theta)
+    tanth = np.tan(theta)
+    k3 = math.sqrt(500) * h * sx_sin
+    k2 = (h + 44 / f / tanth) * sx_sin
+    k0 = 0.568 * g / tanth - 1
+    t = cubic_max_root(k3, k2, -math.sqrt(500), k0)
+    return t * t
+
+
 def gen_n_theta_e1_func(f: float, g: float, h: float, sx: float, func):
     def wrapper(theta: float):
         return func(f, g, h, sx, theta)
@@ -142,25 +320,33 @@ def n_e32_L_smthan_R(f: float, g: float, h: float, sx: float, e1: float, theta:
         return -1, l, r
 
 
-def n_ex2all(f: float, g: float, h: float, sx: float, ex: float):
+def n_ex2all(
+    f: float,
+    g: float,
+    h: float,
+    sx: float,
+    ex: float,
+    init_e1: float = None,
+    stats: SolveStats = None,
+):
     """
     given a specific ex, make the loop to get (e1, theta)
+    >> init_e1: the first e1 (warm start), stats: counts the iterations
+    Failures raise SolverError
     """
     try:
         STEP_FACTOR = 1.5
         step = Const.RELATIVE_STEP_E1 * ex
-        st_e1 = ex + step
+        st_e1 = _start_e1(ex, init_e1)
         n_e1 = st_e1
         o_e1 = n_e1
         theta = e1_theta(ex, n_e1)
         new_compa, l, r = n_e32_L_smthan_R(f, g, h, sx, n_e1, theta)
         old_compa = new_compa
         # looping
-        while True:
-            # ** intermediate results
-            # w = sx * o_e1 / math.sin(theta)
-            # print(f">> e1: {n_e1}, theta: {theta}, L: {l}, R: {r}, w: {w}")
-            # **
+        for i in range(Const.MAX_STEPS_E1):
+            if stats is not None:
+                stats.n_e1 += 1
             n_e1 += old_compa * step
             theta = e1_theta(ex, n_e1)
             new_compa, l, r = n_e32_L_smthan_R(f, g, h, sx, n_e1, theta)
@@ -168,26 +354,18 @@ def n_ex2all(f: float, g: float, h: float, sx: float, ex: float):
                 step = step * STEP_FACTOR
                 old_compa = new_compa
                 o_e1 = n_e1
-                # ** intermediate results
-                # print(f"----- step: {step}")
-                # **
             else:
                 if old_compa > 0:
                     pos_e1, neg_e1 = o_e1, n_e1
                 else:
                     pos_e1, neg_e1 = n_e1, o_e1
-                # ** intermediate results
-                # print("----- bi-sectional iteration")
-                # **
                 break
+        else:
+            raise SolverError("no_bracket", "n_ex2all")
 
-        while True:
-            # ** intermediate results
-            # w = sx * n_e1 / math.sin(theta)
-            # print(
-            #     f">> e1: {n_e1}, theta: {theta}, L: {l}, R: {r}, w: {w}, +e1: {pos_e1}, -e1: {neg_e1}"
-            # )
-            # **
+        for i in range(Const.MAX_STEPS_E1):
+            if stats is not None:
+                stats.n_e1 += 1
             n_e1 = (pos_e1 + neg_e1) * 0.5
             theta = e1_theta(ex, n_e1)
             new_compa, l, r = n_e32_L_smthan_R(f, g, h, sx, n_e1, theta)
@@ -198,18 +376,50 @@ def n_ex2all(f: float, g: float, h: float, sx: float, ex: float):
 
             diff = math.fabs((l - r) / min(l, r))
             if diff < Const.EPS_TOR:
-                # ** intermediate results
-                # w = sx * n_e1 / math.sin(theta)
-                # print(
-                #     f">> found e1: {n_e1}, theta: {theta}, L: {l}, R: {r}, w: {w}, diff_e1: {diff}"
-                # )
-                # **
                 break
+        else:
+            raise SolverError("max_iter", "n_ex2all")
 
         # get the results
         e1 = n_e1
         beta = get_beta(e1, theta)
         return e1, theta, beta
-    except:
-        return -1, -1, -1
+    except (ArithmeticError, ValueError) as e:
+        raise SolverError("math_error", "n_ex2all") from e
+
 
+def _n_e32_ratio_np(f, g, h, sx, ex, u):
+    """r/l - 1 of n_e32_L_smthan_R at e1 = ex + exp(u), with l, r, e1 and theta"""
+    e1 = ex + np.exp(u)
+    theta = e1_theta_np(ex, e1)
+    l = 0.33 / (1 + np.sqrt(500 * e1)) / np.tan(theta)
+    w = sx * e1 / np.sin(theta)
+    r = 0.18 * (1 - h * w) / (0.31 * g + 24 * w / f)
+    return r / l - 1, l, r, e1, theta
+
+
+def n_ex2all_batch(f, g, h, sx, ex):
+    """
+    n_ex2all for broadcastable arrays of f, g, h, sx, ex, solved together by the Illinois method
+    (see ex2all_batch). The points without convergence are nan instead of -1
+
+    return: e1, theta, beta as arrays
+    """
+    shape, (f, g, h, sx, ex) = _broadcast_ravel(f, g, h, sx, ex)
+
+    def func(idx, u):
+        F, l, r, e1, theta = _n_e32_ratio_np(
+            f[idx], g[idx], h[idx], sx[idx], ex[idx], u
+        )
+        return F, (r > 0) & (np.abs(l - r) / np.minimum(l, r) < Const.EPS_TOR)
+
+    with np.errstate(all="ignore"):
+        u = illinois_np(
+            func,
+            np.log(Const.RELATIVE_STEP_E1 * ex),
+            math.log(Const.BRACKET_FACTOR_E1),
+            Const.MAX_ITER_E1,
+        )
+        F, l, r, e1, theta = _n_e32_ratio_np(f, g, h, sx, ex, u)
+        beta = get_beta_np(e1, theta)
+    return e1.reshape(shape), theta.reshape(shape), beta.reshape(shape)
@@ -13,6 +13,186 @@ def polynomial_eq(k: list):
     return rs
 
 
+# relative tolerance of the discriminant of a cubic, below which it has a double root
+EPS_CUBIC_DISC = 1e-12
+# a cubic whose |a| is below EPS_CUBIC_LEAD times its other coefficients is solved as a quadratic
+# (a is within their rounding error, its root beyond |b/a| is not resolved)
+EPS_CUBIC_LEAD = 2.0**-52
+# relative residual |f(x)| / (|a.x^3| + |b.x^2| + |c.x| + |d|) above which a closed-form root is
+# rejected for np.roots, a few times the rounding error of the evaluation
+EPS_CUBIC_RES = 1e-12
+# relative imaginary part below which a root of np.roots is real (double roots split by ~sqrt(eps))
+EPS_CUBIC_IMAG = 1e-7
+
+
+def _cubic_roots_max(a: float, b: float, c: float, d: float, n_newton: int = 2):
+    """largest real root of a cubic by np.roots polished by Newton steps, the fallback of cubic_max_root"""
+    rs = np.roots([a, b, c, d])
+    rs = rs.real[np.abs(rs.imag) <= EPS_CUBIC_IMAG * np.maximum(np.abs(rs), 1)]
+    if len(rs) == 0:
+        return math.nan
+    x = float(rs.max())
+    for i in range(n_newton):
+        df = (3 * a * x + 2 * b) * x + c
+        if df == 0:
+            break
+        x -= (((a * x + b) * x + c) * x + d) / df
+    return x
+
+
+def _cubic_max_root1(a: float, b: float, c: float, d: float, n_newton: int = 2):
+    """cubic_max_root for float coefficients"""
+    if abs(a) <= EPS_CUBIC_LEAD * max(abs(b), abs(c), abs(d)):
+        if b != 0:
+            l = quadratic_eq(b, c, d)
+            return l[-1] if l else math.nan
+        return -d / c if c != 0 else math.nan
+    B, C, D = b / a, c / a, d / a
+    p = C - B * B / 3
+    q = (2 * B * B - 9 * C) * B / 27 + D
+    disc = (q / 2) ** 2 + (p / 3) ** 3
+    if disc > EPS_CUBIC_DISC * (q / 2) ** 2:
+        u = -q / 2 - math.copysign(math.sqrt(disc), q)
+        u = math.copysign(abs(u) ** (1 / 3), u)
+        y = u - p / (3 * u) if u != 0 else 0
+    else:
+        m = math.sqrt(max(-p / 3, 0))
+        arg = min(max(-q / (2 * m**3), -1), 1) if m > 0 else 0
+        y = 2 * m * math.cos(math.acos(arg) / 3)
+    x = y - B / 3
+    for i in range(n_newton):
+        df = (3 * a * x + 2 * b) * x + c
+        if df == 0:
+            break
+        x -= (((a * x + b) * x + c) * x + d) / df
+    f = ((a * x + b) * x + c) * x + d
+    if not abs(f) <= EPS_CUBIC_RES * (
+        ((abs(a) * abs(x) + abs(b)) * abs(x) + abs(c)) * abs(x) + abs(d)
+    ):
+        return _cubic_roots_max(a, b, c, d, n_newton)
+    return x
+
+
+def cubic_max_root(a, b, c, d, n_newton: int = 2):
+    """largest real root of a.x^3 + b.x^2 + c.x + d = 0, for broadcastable arrays of coefficients,
+    in closed form (Cardano for one real root, trigonometric for three) polished by Newton steps.
+    The rows whose root fails the residual check (EPS_CUBIC_RES), e.g. Cardano's cancellation
+    when |a| << |b|, are solved by np.roots instead.
+    Degenerate rows: a = 0 (or below EPS_CUBIC_LEAD) falls back to the quadratic (and linear) equation,
+    nan if there is no real root
+    return: an array (a float for scalar coefficients)
+    """
+    if all(np.ndim(k) == 0 for k in (a, b, c, d)):
+        return _cubic_max_root1(float(a), float(b), float(c), float(d), n_newton)
+    a, b, c, d = np.broadcast_arrays(
+        *[np.asarray(k, dtype=np.float64) for k in (a, b, c, d)]
+    )
+    x = np.full(a.shape, np.nan)
+    with np.errstate(all="ignore"):
+        # cubic: x = y - B/3 with y^3 + p.y + q = 0
+        lead = np.maximum(np.maximum(np.abs(b), np.abs(c)), np.abs(d))
+        cub = np.abs(a) > EPS_CUBIC_LEAD * lead
+        B, C, D = b / a, c / a, d / a
+        p = C - B * B / 3
+        q = (2 * B * B - 9 * C) * B / 27 + D
+        disc = (q / 2) ** 2 + (p / 3) ** 3
+        #   one real root, u without cancellation
+        u = np.cbrt(-q / 2 - np.copysign(np.sqrt(np.maximum(disc, 0)), q))
+        y1 = np.where(u != 0, u - p / (3 * u), 0)
+        #   three real roots (or a double one), the largest of 2.m.cos((acos(.) - 2k.pi)/3)
+        m = np.sqrt(np.maximum(-p / 3, 0))
+        arg = np.clip(np.where(m > 0, -q / (2 * m**3), 0), -1, 1)
+        y3 = 2 * m * np.cos(np.arccos(arg) / 3)
+        one = disc > EPS_CUBIC_DISC * (q / 2) ** 2
+        x = np.where(cub, np.where(one, y1, y3) - B / 3, x)
+
+        # quadratic and linear
+        quad = ~cub & (b != 0)
+        delta = c * c - 4 * b * d
+        r_d = np.sqrt(delta)
+        x = np.where(
+            quad & (delta >= 0), np.maximum((-c - r_d) / 2 / b, (-c + r_d) / 2 / b), x
+        )
+        x = np.where(~cub & (b == 0) & (c != 0), -d / c, x)
+
+        # Newton polish of the cubic roots
+        for i in range(n_newton):
+            f = ((a * x + b) * x + c) * x + d
+            df = (3 * a * x + 2 * b) * x + c
+            x = np.where(cub & (df != 0), x - f / df, x)
+
+        # residual check, np.roots for the rejected rows
+        f = ((a * x + b) * x + c) * x + d
+        ax = np.abs(x)
+        bound = ((np.abs(a) * ax + np.abs(b)) * ax + np.abs(c)) * ax + np.abs(d)
+        bad = cub & ~(np.abs(f) <= EPS_CUBIC_RES * bound)
+    for i in zip(*np.nonzero(bad)):
+        x[i] = _cubic_roots_max(a[i], b[i], c[i], d[i], n_newton)
+    return x
+
+
+def illinois_np(func, u0, du, max_iter: int = 100):
+    """vectorized Illinois (modified regula falsi) solver of independent equations f(u) = 0,
+    for f > 0 below the root and f < 0 above it.
+    - func(idx, u): (f, ok) for the rows idx at u, ok where u is accepted as a root
+    - u0: starting points, du > 0: the step to bracket the roots from u0
+    Rows are dropped as they converge, fail (f is nan) or exceed max_iter (bracketing and refining each)
+    return: the roots, nan for the failed rows
+    """
+    u0 = np.asarray(u0, dtype=np.float64)
+    n = len(u0)
+    du = np.broadcast_to(np.asarray(du, dtype=np.float64), (n,))
+    root = np.full(n, np.nan)
+    ua, fa, ub, fb = (np.full(n, np.nan) for i in range(4))
+
+    def accept(idx, u, f, ok):
+        root[idx[ok]] = u[ok]
+        return ~ok & ~np.isnan(f)
+
+    # bracket the roots, ua with f > 0, ub with f < 0
+    idx = np.arange(n)
+    last = u0.copy()
+    f_last, ok = func(idx, last)
+    left = accept(idx, last, f_last, ok)
+    up = f_last > 0
+    d = np.where(up, du, -du)
+    idx = idx[left]
+    for i in range(max_iter):
+        if len(idx) == 0:
+            break
+        u = last[idx] + d[idx]
+        f, ok = func(idx, u)
+        left = accept(idx, u, f, ok)
+        crossed = left & ((f > 0) != up[idx])
+        j, k = idx[crossed], up[idx[crossed]]
+        ua[j] = np.where(k, last[j], u[crossed])
+        fa[j] = np.where(k, f_last[j], f[crossed])
+        ub[j] = np.where(k, u[crossed], last[j])
+        fb[j] = np.where(k, f[crossed], f_last[j])
+        last[idx], f_last[idx] = u, f
+        idx = idx[left & ~crossed]
+
+    # refine the brackets
+    idx = np.flatnonzero(~np.isnan(ua) & np.isnan(root))
+    side = np.zeros(n)
+    for i in range(max_iter):
+        if len(idx) == 0:
+            break
+        u = (ua[idx] * fb[idx] - ub[idx] * fa[idx]) / (fb[idx] - fa[idx])
+        f, ok = func(idx, u)
+        left = accept(idx, u, f, ok)
+        pos = f > 0
+        j, k = idx[pos], idx[~pos]
+        ua[j], fa[j] = u[pos], f[pos]
+        fb[j] = np.where(side[j] > 0, fb[j] / 2, fb[j])
+        side[j] = 1
+        ub[k], fb[k] = u[~pos], f[~pos]
+        fa[k] = np.where(side[k] < 0, fa[k] / 2, fa[k])
+        side[k] = -1
+        idx = idx[left]
+    return root
+
+
 def quadratic_eq(a: float, b: float, c: float):
     """solve a quadratic equation, found values are in the asc sort
     return: a list of found values sorted ascendingly
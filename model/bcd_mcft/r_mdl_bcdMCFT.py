@@ -1,7 +1,11 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import math
+import time
+import numpy as np
+import pandas as pd
 from model.bcd_mcft.r_beam import *
 import model.bcd_mcft.r_coreF_bcdMCFT as cF
+from model.bcd_mcft.r_eng_support import illinois_np
 
 
 @dataclass
@@ -16,6 +20,14 @@ class BCD_RunSetting:
     f_B: float = 8
     # for g = 1 + C*(1-pv)
     g_C: float = 0.5
+    # solver of e1 for a given ex: "step" (cF.ex2all) or "illinois" (cF.ex2all_illinois)
+    e1_solver: str = "step"
+    # first e1 of the e1 solvers as a ratio of ex (warm start), None for ex + step
+    init_e1_ratio: float = None
+    # budgets of the loop of ex: iterations, and seconds (None for no limit). The loop takes ~5 iterations
+    # for NMdl_bcdMCFT and ~36 (up to ~140) for Mdl_bcdMCFT, past max_iter a row is taken as not converging
+    max_iter: int = 300
+    time_budget: float = None
 
 
 @dataclass
@@ -23,11 +35,165 @@ class NBCD_RunSetting(BCD_RunSetting):
     # for the new idea of
     # for X = 1 - H.w, wherein H = E/ag. The E value is 2 by default
     h_E: float = 2
+    # acceleration of the fixed point loop of ex: None (damping), "aitken" or "anderson", see _next_ex
+    ex_accel: str = None
+
+
+@dataclass
+class SolveResult:
+    """
+    result of a shear strength solve (Mdl_bcdMCFT.solve, NMdl_bcdMCFT.solve), nan values if not converged
+    - residual: the last relative change of ex, iterations: of ex
+    - reason: "" if converged, else the reason of cF.SolverError or the type of the error
+    """
+
+    vc: float
+    beta: float
+    e1: float
+    theta: float
+    ex: float
+    converged: bool
+    iterations: int
+    residual: float
+    reason: str = ""
+
+
+def _deadline(r_setting: BCD_RunSetting):
+    if r_setting.time_budget is None:
+        return None
+    return time.perf_counter() + r_setting.time_budget
+
+
+def _check_deadline(deadline: float):
+    if deadline is not None and time.perf_counter() > deadline:
+        raise cF.SolverError("time_budget", "getShearStrength_F")
+
+
+def _next_ex(hist: list, accel: str = None):
+    """
+    next ex of the fixed point ex = g(ex), g = _vc2ex(_ex2vc(ex)), from hist = [(ex, g(ex)), ...]
+    the evaluations since the last restart (oldest first)
+    - None: damping, (ex + g) / 2
+    - "aitken": Aitken delta-squared over two damped steps (Steffensen), the caller restarts hist after it
+    - "anderson": Anderson mixing of depth 1, i.e. a secant step on g(ex) - ex (ex is a scalar)
+    Accelerated steps that are not finite and positive fall back to damping
+
+    return: ex, accelerated
+    """
+    x1, g1 = hist[-1]
+    damped = (x1 + g1) * 0.5
+    if accel is None or len(hist) < 2:
+        return damped, False
+    x0, g0 = hist[-2]
+    if accel == "aitken":
+        # x1 = (x0 + g0) / 2 and damped = (x1 + g1) / 2 are 2 damped steps from x0
+        d2 = damped - 2 * x1 + x0
+        x = x0 - (x1 - x0) ** 2 / d2 if d2 != 0 else math.nan
+    elif accel == "anderson":
+        dr = (g1 - x1) - (g0 - x0)
+        x = g1 - (g1 - x1) / dr * (g1 - g0) if dr != 0 else math.nan
+    else:
+        raise ValueError(f"unknown ex_accel: {accel}")
+    if math.isfinite(x) and x > 0:
+        return x, True
+    return damped, False
+
+
+def _solve(mdl) -> SolveResult:
+    """getShearStrength_F of a model as a SolveResult"""
+    try:
+        vc, beta, e1, theta, ex = mdl.getShearStrength_F()
+    except cF.SolverError as e:
+        reason = e.reason
+    except (ArithmeticError, ValueError) as e:
+        reason = type(e).__name__
+    else:
+        return SolveResult(
+            vc, beta, e1, theta, ex, True, mdl.stats.n_ex, mdl.stats.residual
+        )
+    nan = math.nan
+    return SolveResult(
+        nan, nan, nan, nan, nan, False, mdl.stats.n_ex, mdl.stats.residual, reason
+    )
+
+
+class ExTrace:
+    """
+    collector of the iterations of the ex loop (getShearStrength_F) in preallocated arrays, grown by doubling.
+    A model calls its trace (any callable with the arguments of __call__) on each iteration if it is set
+    """
+
+    FIELDS = ("iteration", "ex", "n_ex", "diff", "vc", "step")
+
+    def __init__(self, capacity: int = 256):
+        self._data = np.empty((len(self.FIELDS), capacity), dtype=np.float64)
+        self.n = 0
+
+    def __call__(
+        self, iteration: int, ex: float, n_ex: float, diff: float, vc: float, step
+    ):
+        if self.n == self._data.shape[1]:
+            self._data = np.concatenate((self._data, np.empty_like(self._data)), axis=1)
+        self._data[:, self.n] = iteration, ex, n_ex, diff, vc, step
+        self.n += 1
+
+    def __len__(self):
+        return self.n
+
+    def clear(self):
+        self.n = 0
+
+    def to_frame(self) -> pd.DataFrame:
+        """the recorded iterations as a DataFrame with the columns FIELDS"""
+        df = pd.DataFrame(dict(zip(self.FIELDS, self._data[:, : self.n])))
+        return df.astype({"iteration": np.int64})
+
+
+def _solve_batch(mdl, max_iter: int):
+    """
+    getShearStrength_S of a model whose geo, mat and r_setting.pv hold arrays (N beams):
+    ex is solved on log(ex) by the Illinois method, the residual log(n_ex/o_ex) being within
+    eps_tolerance as in getShearStrength_F, and the beams leave the iteration as they converge
+    """
+    rs = mdl.r_setting
+    values = [mdl.geo.a, mdl.geo.b, mdl.geo.d, rs.pv]
+    values += [mdl.mat.fc, mdl.mat.e_s, mdl.mat.steel_ratio, mdl.mat.ag]
+    n = np.broadcast(*values).size
+    coefs = {
+        name: np.broadcast_to(np.asarray(v, dtype=np.float64), (n,))
+        for name, v in mdl._batch_coefs().items()
+    }
+
+    def func(idx, v):
+        ex = np.exp(v)
+        vc = mdl._ex2vc_batch(coefs, idx, ex)[0]
+        f = np.log(mdl._vc2ex(vc, coefs["k_ex"][idx]) / ex)
+        return f, np.expm1(np.abs(f)) < rs.eps_tolerance
+
+    with np.errstate(all="ignore"):
+        v = illinois_np(
+            func,
+            np.full(n, math.log(rs.init_ex)),
+            math.log(cF.Const.BRACKET_FACTOR_EX),
+            max_iter,
+        )
+    ex = np.exp(v)
+    vc, beta, e1, theta = mdl._ex2vc_batch(coefs, np.arange(n), ex)
+    return vc / np.broadcast_to(mdl.geo.area(), (n,)), beta, e1, theta, ex
 
 
 @dataclass
 class Mdl_bcdMCFT(Beam):
     r_setting: BCD_RunSetting
+    stats: cF.SolveStats = field(
+        default_factory=cF.SolveStats, repr=False, compare=False
+    )
+    # hook called with (iteration, ex, n_ex, diff, vc, step) on each iteration of ex, see ExTrace
+    trace: object = field(default=None, repr=False, compare=False)
+
+    def _init_e1(self, ex: float):
+        ratio = self.r_setting.init_e1_ratio
+        return None if ratio is None else ratio * ex
 
     def _calF(self):
         f = (self.mat.ag + self.r_setting.f_A) * self.r_setting.pv + self.r_setting.f_B
@@ -62,21 +228,31 @@ class Mdl_bcdMCFT(Beam):
         #   sze
         sze = self._cal_sze()
         #   beta
-        e1, theta, beta = cF.ex2all(g=g, sxe=sze, ex=ex)
+        if self.r_setting.e1_solver == "illinois":
+            e1, theta, beta = cF.ex2all_illinois(
+                g=g, sxe=sze, ex=ex, init_e1=self._init_e1(ex), stats=self.stats
+            )
+        else:
+            e1, theta, beta = cF.ex2all(
+                g=g, sxe=sze, ex=ex, init_e1=self._init_e1(ex), stats=self.stats
+            )
         dv = 0.9 * self.geo.d
         vc = beta * math.sqrt(self.mat.fc) * self.geo.b * dv
         return vc, beta, e1, theta
 
-    def _vc2ex(self, vc: float) -> float:
+    def _vc2ex(self, vc: float, k_ex: float = None) -> float:
         """
         function to calculate the longitudinal strain (ex) from
         a specific shear force (vc)
         Examples:
         Args:
             vc (float): the value of shear force Vc
+            k_ex (float): ex/vc if known
         Returns:
             float: the value of calculated longitudinal strain
         """
+        if k_ex is not None:
+            return vc * k_ex
         # the longitudinal steel ratio
         a_s = self._cal_a_s()
         a = self.geo.a
@@ -92,45 +268,57 @@ class Mdl_bcdMCFT(Beam):
         else:
             return -1
 
-    def loop_ex(self):
-        """ """
-        lowest_step = math.ulp(0.001)
-        r_setting = self.r_setting
-        step = r_setting.relative_step_ex * r_setting.init_ex
-        o_ex = r_setting.init_ex
-        # calculate the shear force (vc)
-        vc, beta, e1, theta = self._ex2vc(o_ex)
-        # calculate the new value of longitudinal strain (n_ex)
-        n_ex = self._vc2ex(vc)
-        old_compa = self._smallOldex(o_ex, n_ex)
-        diff = math.fabs(n_ex - o_ex) / min(o_ex, n_ex)
-        print(
-            f"o_ex: {o_ex:.7f}, n_ex: {n_ex:.7f}, diff: {diff:.7f}, shear stress: {vc/self.geo.area():.7f}, step: {step}"
-        )
-        while True:
-            if step > lowest_step:
-                o_ex += old_compa * step
-            else:
-                break
-            # calculate the shear force (vc)
-            vc, beta, e1, theta = self._ex2vc(o_ex)
-            # calculate the new value of longitudinal strain (n_ex)
-            n_ex = self._vc2ex(vc)
-            # check the change of ex
-            new_compa = self._smallOldex(o_ex, n_ex)
-            if new_compa * old_compa < 0:
-                step = step / 2
-                diff = math.fabs(n_ex - o_ex) / min(o_ex, n_ex)
-                print(
-                    f"o_ex: {o_ex:.7f}, n_ex: {n_ex:.7f}, diff: {diff:.7f}, shear stress: {vc/self.geo.area():.7f}, step: {step}"
-                )
-                # check the condition of tolerance
-                if diff < r_setting.eps_tolerance:
-                    break
-            old_compa = new_compa
+    def _batch_coefs(self) -> dict:
+        """coefficients of _ex2vc and _vc2ex for solve_batch, as arrays or floats"""
+        dv = 0.9 * self.geo.d
+        return {
+            "g": self._calG(),
+            "sxe": self._cal_sze(),
+            "k_vc": np.sqrt(self.mat.fc) * self.geo.b * dv,
+            "k_ex": self._vc2ex(1.0),
+        }
+
+    def _ex2vc_batch(self, coefs: dict, idx: np.ndarray, ex: np.ndarray):
+        """_ex2vc for the beams idx of solve_batch"""
+        e1, theta, beta = cF.ex2all_batch(coefs["g"][idx], coefs["sxe"][idx], ex)
+        vc = beta * coefs["k_vc"][idx]
+        return vc, beta, e1, theta
+
+    @classmethod
+    def solve_batch(
+        cls,
+        geo: Geometry,
+        mat: Material,
+        r_setting: BCD_RunSetting,
+        factors: FactorSetting = None,
+        max_iter: int = 100,
+    ):
+        """
+        getShearStrength_S for N beams at once: the fields of geo and mat, and r_setting.pv,
+        are arrays of length N (or floats). The results match the scalar path within eps_tolerance,
+        the beams without convergence are nan
+        return: arrays of vc/area, beta, e1, theta, ex
+        """
+        mdl = cls(geo, mat, factors or FactorSetting(), r_setting)
+        return _solve_batch(mdl, max_iter)
+
+    def loop_ex(self, trace=None):
+        """
+        run getShearStrength_F recording its iterations into trace (an ExTrace by default)
+        return: the trace
+        """
+        trace = ExTrace() if trace is None else trace
+        self.trace = trace
+        try:
+            self.getShearStrength_F()
+        finally:
+            self.trace = None
+        return trace
 
     def getShearStrength_F(self):
         """ """
+        self.stats = cF.SolveStats()
+        trace = self.trace
         lowest_step = math.ulp(0.001)
         r_setting = self.r_setting
         step = r_setting.relative_step_ex * r_setting.init_ex
@@ -140,7 +328,13 @@ class Mdl_bcdMCFT(Beam):
         # calculate the new value of longitudinal strain (n_ex)
         n_ex = self._vc2ex(vc)
         old_compa = self._smallOldex(o_ex, n_ex)
-        while True:
+        diff = math.fabs(n_ex - o_ex) / min(o_ex, n_ex)
+        if trace is not None:
+            trace(0, o_ex, n_ex, diff, vc, step)
+        deadline = _deadline(r_setting)
+        for i in range(r_setting.max_iter):
+            _check_deadline(deadline)
+            self.stats.n_ex += 1
             if step > lowest_step:
                 o_ex += old_compa * step
             else:
@@ -151,14 +345,20 @@ class Mdl_bcdMCFT(Beam):
             n_ex = self._vc2ex(vc)
             # check the change of ex
             new_compa = self._smallOldex(o_ex, n_ex)
+            diff = math.fabs(n_ex - o_ex) / min(o_ex, n_ex)
+            if trace is not None:
+                trace(self.stats.n_ex, o_ex, n_ex, diff, vc, step)
             if new_compa * old_compa < 0:
                 step = step / 2
-                diff = math.fabs(n_ex - o_ex) / min(o_ex, n_ex)
                 # check the condition of tolerance
                 if diff < r_setting.eps_tolerance:
                     break
             old_compa = new_compa
+        else:
+            self.stats.residual = diff
+            raise cF.SolverError("max_iter", "getShearStrength_F")
 
+        self.stats.residual = diff
         return vc, beta, e1, theta, o_ex
 
     def getShearStrength_S(self):
@@ -166,6 +366,10 @@ class Mdl_bcdMCFT(Beam):
         vc, beta, e1, theta, ex = self.getShearStrength_F()
         return vc / self.geo.area(), beta, e1, theta, ex
 
+    def solve(self) -> "SolveResult":
+        """getShearStrength_F as a SolveResult, failures included"""
+        return _solve(self)
+
     def t_results(self):
         self.loop_ex()
 
@@ -173,6 +377,15 @@ class Mdl_bcdMCFT(Beam):
 @dataclass
 class NMdl_bcdMCFT(Beam):
     r_setting: NBCD_RunSetting
+    stats: cF.SolveStats = field(
+        default_factory=cF.SolveStats, repr=False, compare=False
+    )
+    # hook called with (iteration, ex, n_ex, diff, vc, step) on each iteration of ex, see ExTrace
+    trace: object = field(default=None, repr=False, compare=False)
+
+    def _init_e1(self, ex: float):
+        ratio = self.r_setting.init_e1_ratio
+        return None if ratio is None else ratio * ex
 
     def _calF(self):
         f = (self.mat.ag + self.r_setting.f_A) * self.r_setting.pv + self.r_setting.f_B
@@ -202,20 +415,25 @@ class NMdl_bcdMCFT(Beam):
         #   sx
         sx = dv = 0.9 * self.geo.d
         #   beta
-        e1, theta, beta = cF.n_ex2all(f, g, h, sx, ex)
+        e1, theta, beta = cF.n_ex2all(
+            f, g, h, sx, ex, init_e1=self._init_e1(ex), stats=self.stats
+        )
         vc = beta * math.sqrt(self.mat.fc) * self.geo.b * dv
         return vc, beta, e1, theta
 
-    def _vc2ex(self, vc: float) -> float:
+    def _vc2ex(self, vc: float, k_ex: float = None) -> float:
         """
         function to calculate the longitudinal strain (ex) from
         a specific shear force (vc)
         Examples:
         Args:
             vc (float): the value of shear force Vc
+            k_ex (float): ex/vc if known
         Returns:
             float: the value of calculated longitudinal strain
         """
+        if k_ex is not None:
+            return vc * k_ex
         # the longitudinal steel ratio
         a_s = self._cal_a_s()
         a = self.geo.a
@@ -231,39 +449,59 @@ class NMdl_bcdMCFT(Beam):
         else:
             return -1
 
-
-    def loop_ex(self):
-        """ """
-        r_setting = self.r_setting
-        step = r_setting.relative_step_ex * r_setting.init_ex
-        o_ex = r_setting.init_ex
-        # calculate the shear force (vc)
-        vc, beta, e1, theta = self._ex2vc(o_ex)
-        # calculate the new value of longitudinal strain (n_ex)
-        n_ex = self._vc2ex(vc)
-        diff = math.fabs(n_ex - o_ex) / min(o_ex, n_ex)
-        print(
-            f"RETURN >> o_ex: {o_ex:.7f}, n_ex: {n_ex:.7f}, diff: {diff:.7f}, shear stress: {vc/self.geo.area():.7f}, step: {step}"
+    def _batch_coefs(self) -> dict:
+        """coefficients of _ex2vc and _vc2ex for solve_batch, as arrays or floats"""
+        dv = 0.9 * self.geo.d
+        return {
+            "f": self._calF(),
+            "g": self._calG(),
+            "h": self._calH(),
+            "sx": dv,
+            "k_vc": np.sqrt(self.mat.fc) * self.geo.b * dv,
+            "k_ex": self._vc2ex(1.0),
+        }
+
+    def _ex2vc_batch(self, coefs: dict, idx: np.ndarray, ex: np.ndarray):
+        """_ex2vc for the beams idx of solve_batch"""
+        e1, theta, beta = cF.n_ex2all_batch(
+            *[coefs[name][idx] for name in ("f", "g", "h", "sx")], ex
         )
-        print()
-        while True:
-            o_ex = (o_ex + n_ex) * 0.5
-            # calculate the shear force (vc)
-            vc, beta, e1, theta = self._ex2vc(o_ex)
-            # calculate the new value of longitudinal strain (n_ex)
-            n_ex = self._vc2ex(vc)
+        vc = beta * coefs["k_vc"][idx]
+        return vc, beta, e1, theta
 
-            diff = math.fabs(n_ex - o_ex) / min(o_ex, n_ex)
-            print(
-                f"RETURN >> o_ex: {o_ex:.7f}, n_ex: {n_ex:.7f}, diff_ex: {diff:.7f}, shear stress: {vc/self.geo.area():.7f}, step: {step}"
-            )
-            print()
+    @classmethod
+    def solve_batch(
+        cls,
+        geo: Geometry,
+        mat: Material,
+        r_setting: NBCD_RunSetting,
+        factors: FactorSetting = None,
+        max_iter: int = 100,
+    ):
+        """
+        getShearStrength_S for N beams at once, see Mdl_bcdMCFT.solve_batch
+        return: arrays of vc/area, beta, e1, theta, ex
+        """
+        mdl = cls(geo, mat, factors or FactorSetting(), r_setting)
+        return _solve_batch(mdl, max_iter)
 
-            if diff < r_setting.eps_tolerance:
-                break
+    def loop_ex(self, trace=None):
+        """
+        run getShearStrength_F recording its iterations into trace (an ExTrace by default)
+        return: the trace
+        """
+        trace = ExTrace() if trace is None else trace
+        self.trace = trace
+        try:
+            self.getShearStrength_F()
+        finally:
+            self.trace = None
+        return trace
 
     def getShearStrength_F(self):
         """ """
+        self.stats = cF.SolveStats()
+        trace = self.trace
         r_setting = self.r_setting
         step = r_setting.relative_step_ex * r_setting.init_ex
         o_ex = r_setting.init_ex
@@ -272,24 +510,56 @@ class NMdl_bcdMCFT(Beam):
         # calculate the new value of longitudinal strain (n_ex)
         n_ex = self._vc2ex(vc)
         diff = math.fabs(n_ex - o_ex) / min(o_ex, n_ex)
-        while True:
-            o_ex = (o_ex + n_ex) * 0.5
-            # calculate the shear force (vc)
-            vc, beta, e1, theta = self._ex2vc(o_ex)
-            # calculate the new value of longitudinal strain (n_ex)
-            n_ex = self._vc2ex(vc)
+        if trace is not None:
+            trace(0, o_ex, n_ex, diff, vc, step)
+        deadline = _deadline(r_setting)
+        accel = r_setting.ex_accel
+        hist = [(o_ex, n_ex)]
+        for i in range(r_setting.max_iter):
+            _check_deadline(deadline)
+            self.stats.n_ex += 1
+            x, accelerated = _next_ex(hist, accel)
+            try:
+                # calculate the shear force (vc)
+                rets = self._ex2vc(x)
+                # calculate the new value of longitudinal strain (n_ex)
+                g = self._vc2ex(rets[0])
+                # an accelerated step must reduce the residual, else damping from here on
+                bad = accelerated and math.fabs(g - x) > math.fabs(n_ex - o_ex)
+            except (cF.SolverError, ArithmeticError, ValueError):
+                if not accelerated:
+                    raise
+                bad = True
+            if bad:
+                accel = None
+                hist = hist[-1:]
+                continue
+            o_ex, n_ex = x, g
+            vc, beta, e1, theta = rets
+            if accelerated and accel == "aitken":
+                hist = []
+            hist = hist[-1:] + [(o_ex, n_ex)]
 
             diff = math.fabs(n_ex - o_ex) / min(o_ex, n_ex)
+            if trace is not None:
+                trace(self.stats.n_ex, o_ex, n_ex, diff, vc, step)
             if diff < r_setting.eps_tolerance:
                 break
+        else:
+            self.stats.residual = diff
+            raise cF.SolverError("max_iter", "getShearStrength_F")
 
+        self.stats.residual = diff
         return vc, beta, e1, theta, o_ex
 
-
     def getShearStrength_S(self):
         """ """
         vc, beta, e1, theta, ex = self.getShearStrength_F()
         return vc / self.geo.area(), beta, e1, theta, ex
 
+    def solve(self) -> "SolveResult":
+        """getShearStrength_F as a SolveResult, failures included"""
+        return _solve(self)
+
     def t_results(self):
         self.loop_ex()
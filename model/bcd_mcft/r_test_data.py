@@ -1,85 +1,305 @@
+import math
+import time
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 
 from model.bcd_mcft.r_beam import *
 from model.bcd_mcft.r_mdl_bcdMCFT import *
+import model.bcd_mcft.r_coreF_bcdMCFT as cF
 
+# the models of process_data, and their results as columns "<model>_<result>"
+MODEL_NAMES = ("m0", "m1", "m2")
+RESULT_NAMES = ("theta", "b", "s", "w")
+# the input columns of process_data
+INPUT_COLS = ("a", "b", "d", "fc", "Es", "ag", "Ec", "pv", "s_ratio")
+# budget of the loop of ex of a warm-started solve, past which the beam is solved from scratch.
+# Seeded solves take ~3 iterations (cold ones ~5 for m2, ~27 for m0, m1), a seed that does not
+# converge by then may be caught in a cycle just above eps_tolerance
+WARM_MAX_ITER = 20
 
-def process_data(df: pd.DataFrame, fA=8, fB=8, gC=0.5, hE=2):
+
+def _models(pv, fA=8, fB=8, gC=0.5, hE=2):
+    """the model classes and run settings of m0, m1, m2 for beams of pv"""
+    r0_setting = BCD_RunSetting()
+    r1_setting = BCD_RunSetting(f_A=0, f_B=16, g_C=0, pv=pv)
+    r2_setting = NBCD_RunSetting(f_A=fA, f_B=fB, g_C=gC, h_E=hE, pv=pv)
+    return (
+        (Mdl_bcdMCFT, r0_setting),
+        (Mdl_bcdMCFT, r1_setting),
+        (NMdl_bcdMCFT, r2_setting),
+    )
+
+
+def _solve_beam(
+    cls, geo, mat, factors, r_setting, seed=None, stats=None, restarts: list = None
+):
+    """
+    getShearStrength_S of a beam, started from seed = (ex, e1/ex) if given (within WARM_MAX_ITER iterations),
+    and from scratch if that fails, the reason of which is appended to restarts if given.
+    The iterations are added to stats (a cF.SolveStats) if given
+    """
+
+    def solve(r_setting):
+        model = cls(geo, mat, factors, r_setting)
+        try:
+            return model.getShearStrength_S()
+        finally:
+            if stats is not None:
+                stats.n_ex += model.stats.n_ex
+                stats.n_e1 += model.stats.n_e1
+
+    if seed is not None:
+        seeded = replace(
+            r_setting,
+            init_ex=seed[0],
+            init_e1_ratio=seed[1],
+            max_iter=min(r_setting.max_iter, WARM_MAX_ITER),
+        )
+        try:
+            rets = solve(seeded)
+            if rets[0] > 0 and all(math.isfinite(v) for v in rets):
+                return rets
+            reason = "invalid"
+        except Exception as e:
+            reason = _reason(e)
+        if restarts is not None:
+            restarts.append(reason)
+    return solve(r_setting)
+
+
+def _process_rows(
+    cols: dict,
+    fA=8,
+    fB=8,
+    gC=0.5,
+    hE=2,
+    warm_start: bool = False,
+    stats=None,
+    failures: dict = None,
+    restarts: list = None,
+) -> np.ndarray:
+    """
+    results of process_data beam by beam, shape (len(MODEL_NAMES), len(RESULT_NAMES), n).
+    A model that fails on a beam gives nan for it, the other beams and models are kept
+    >> warm_start: the beams are solved in the order of (a/d, d, s_ratio, pv, fc), each model starting
+       from the ex and e1/ex of the previous beam, see _solve_beam
+    >> stats: a cF.SolveStats for each model, to add the iterations to
+    >> failures: {row: reason} to add the failed beams to (the reason of the first failed model),
+       the failures raise if it is None
+    >> restarts: [(row, model, reason)] to add the warm starts that failed (solved from scratch) to
+    """
+    n = len(cols["a"])
+    out = np.empty((len(MODEL_NAMES), len(RESULT_NAMES), n), dtype=np.float64)
+    factors = FactorSetting()
+    if warm_start:
+        order = np.lexsort(
+            (
+                cols["fc"],
+                cols["pv"],
+                cols["s_ratio"],
+                cols["d"],
+                cols["a"] / cols["d"],
+            )
+        )
+    else:
+        order = range(n)
+    seeds = [None] * len(MODEL_NAMES)
+    for i in order:
+        mat = Material(
+            fc=cols["fc"][i],
+            e_s=cols["Es"][i],
+            steel_ratio=cols["s_ratio"][i],
+            ag=cols["ag"][i],
+            e_c=cols["Ec"][i],
+        )
+        geo = Geometry(a=cols["a"][i], b=cols["b"][i], d=cols["d"][i])
+        for k, (cls, r_setting) in enumerate(_models(cols["pv"][i], fA, fB, gC, hE)):
+            reasons = []
+            try:
+                vc_s, beta, e1, theta, ex = _solve_beam(
+                    cls,
+                    geo,
+                    mat,
+                    factors,
+                    r_setting,
+                    seeds[k],
+                    stats and stats[k],
+                    reasons,
+                )
+            except Exception as e:
+                if failures is None:
+                    raise
+                failures.setdefault(int(i), _reason(e))
+                out[k, :, i] = np.nan
+                continue
+            finally:
+                if restarts is not None:
+                    restarts.extend((int(i), MODEL_NAMES[k], r) for r in reasons)
+            if warm_start:
+                seeds[k] = ex, e1 / ex
+            w = geo.d * 0.9 * e1 / math.sin(theta)
+            out[k, :, i] = theta, beta, vc_s, w
+    return out
+
+
+def _process_batch(cols: dict, fA=8, fB=8, gC=0.5, hE=2) -> np.ndarray:
+    """results of process_data by the batched solvers (solve_batch), as _process_rows"""
+    n = len(cols["a"])
+    out = np.empty((len(MODEL_NAMES), len(RESULT_NAMES), n), dtype=np.float64)
+    mat = Material(
+        fc=cols["fc"], e_s=cols["Es"], steel_ratio=cols["s_ratio"], ag=cols["ag"]
+    )
+    geo = Geometry(a=cols["a"], b=cols["b"], d=cols["d"])
+    for k, (cls, r_setting) in enumerate(_models(cols["pv"], fA, fB, gC, hE)):
+        vc_s, beta, e1, theta, ex = cls.solve_batch(geo, mat, r_setting)
+        w = geo.d * 0.9 * e1 / np.sin(theta)
+        out[k] = theta, beta, vc_s, w
+    return out
+
+
+def _iterations(stats) -> dict:
+    """{model: {"n_ex", "n_e1"}} from a cF.SolveStats for each model"""
+    return {m: {"n_ex": st.n_ex, "n_e1": st.n_e1} for m, st in zip(MODEL_NAMES, stats)}
+
+
+def _reason(e: Exception) -> str:
+    """reason of a failed row: that of a cF.SolverError, else the type of the error"""
+    return e.reason if isinstance(e, cF.SolverError) else type(e).__name__
+
+
+def _process_chunk(cols: dict, fA, fB, gC, hE, batch: bool, warm_start: bool):
+    """
+    results of process_data for a chunk of rows, with its report {"seconds", "failed", "reasons", "error",
+    "iterations", "restarts"}. Beam by beam, the failed beams are nan (see _process_rows). Batched, the rows of nan
+    are the failed ones, and all of them if the batch raises (error)
+    """
+    start = time.perf_counter()
+    stats = None if batch else [cF.SolveStats() for m in MODEL_NAMES]
+    n = len(cols["a"])
+    failed, reasons, error, restarts = [], [], None, []
+    if batch:
+        try:
+            out = _process_batch(cols, fA, fB, gC, hE)
+            reason = "nan"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            out = np.full((len(MODEL_NAMES), len(RESULT_NAMES), n), np.nan)
+            reason = _reason(e)
+        failed = np.flatnonzero(np.isnan(out).any(axis=(0, 1))).tolist()
+        reasons = [reason] * len(failed)
+    else:
+        failures = {}
+        out = _process_rows(cols, fA, fB, gC, hE, warm_start, stats, failures, restarts)
+        failed = sorted(failures)
+        reasons = [failures[i] for i in failed]
+    return out, {
+        "seconds": time.perf_counter() - start,
+        "failed": failed,
+        "reasons": reasons,
+        "error": error,
+        "iterations": None if batch else _iterations(stats),
+        "restarts": restarts,
+    }
+
+
+def _process_chunks(
+    cols: dict,
+    fA,
+    fB,
+    gC,
+    hE,
+    batch: bool,
+    warm_start: bool,
+    workers: int,
+    chunksize: int,
+):
+    """
+    process_data by chunks of chunksize rows, in a pool of workers processes if workers > 1
+
+    return: the results in the order of the rows, and the reports of the chunks
+    """
+    n = len(cols["a"])
+    if chunksize is None:
+        chunksize = max(1, math.ceil(n / (max(workers or 1, 1) * 4)))
+    bounds = [(s, min(s + chunksize, n)) for s in range(0, n, chunksize)]
+    chunks = [{name: v[s:e] for name, v in cols.items()} for s, e in bounds]
+    args = [fA, fB, gC, hE, batch, warm_start]
+    if workers is not None and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rets = list(
+                executor.map(_process_chunk, chunks, *[[a] * len(chunks) for a in args])
+            )
+    else:
+        rets = [_process_chunk(chunk, *args) for chunk in chunks]
+
+    out = np.empty((len(MODEL_NAMES), len(RESULT_NAMES), n), dtype=np.float64)
+    reports = []
+    for (s, e), (out_chunk, report) in zip(bounds, rets):
+        out[..., s:e] = out_chunk
+        report["failed"] = [s + i for i in report["failed"]]
+        report["restarts"] = [(s + i, m, r) for i, m, r in report["restarts"]]
+        reports.append({"start": s, "stop": e, **report})
+    return out, reports
+
+
+def process_data(
+    df: pd.DataFrame,
+    fA=8,
+    fB=8,
+    gC=0.5,
+    hE=2,
+    batch: bool = False,
+    workers: int = None,
+    chunksize: int = None,
+    warm_start: bool = False,
+):
     """* process_dataB
     - m0: Original MCFT with pv=1, A, B, C, E=0
     - m1: MCFT based on agm with real pv, A=0, B=16, C=0, E=0
     - m2: new MCFT (by BCD) with real pv, A, B, C, E
+
+    The input columns are read once as float64 arrays, each row is computed on its own
+    (beam by beam, or by the batched solvers if batch) and the float64 results are returned
+    as the new columns of a copy of df
+
+    If workers or chunksize is given, the rows are split into chunks (of chunksize rows, 4 chunks per worker
+    by default) solved in a pool of workers processes, in the order of the rows, else they are one chunk.
+    The rows that fail are nan instead of raising, and df.attrs["process_data"] reports {"seconds", "workers",
+    "chunks": [{"start", "stop", "seconds", "failed": positions of the failed rows, "reasons": why each failed
+    ("max_iter", "time_budget", "no_bracket", "math_error" of cF.SolverError, else the type of the error,
+    "nan" for batch), "error": the error of a batch that raised, "iterations", "restarts": [(row, model,
+    reason)] of the warm starts that failed, the beam solved from scratch}]}
+
+    warm_start: the beams (of each chunk) are solved from the ex and e1/ex of the previous similar beam,
+    see _process_rows. Beam by beam, df.attrs["iterations"] reports the iterations {model: {"n_ex", "n_e1"}}
     """
-    # new columns to the dataframe
-    df["m0_theta"] = None
-    df["m0_b"] = None
-    df["m0_s"] = None
-    df["m0_w"] = None
-
-    df["m1_theta"] = None
-    df["m1_b"] = None
-    df["m1_s"] = None
-    df["m1_w"] = None
-
-    df["m2_theta"] = None
-    df["m2_b"] = None
-    df["m2_s"] = None
-    df["m2_w"] = None
-    # calculate beta and shear strength
-    nr = df.shape[0]
-    for i in range(nr):
-        # factor setting
-        factors = FactorSetting()
-        # run setting
-        r0_setting = BCD_RunSetting()
-
-        r1_setting = BCD_RunSetting()
-        r1_setting.f_A = 0
-        r1_setting.f_B = 16
-        r1_setting.g_C = 0
-        r1_setting.pv = df["pv"][i]
-
-        r2_setting = NBCD_RunSetting(f_A=fA, f_B=fB, g_C=gC, h_E=hE)
-        r2_setting.pv = df["pv"][i]
-        # get the material data
-        mat = Material(
-            fc=df["fc"][i],
-            e_s=df["Es"][i],
-            steel_ratio=df["s_ratio"][i],
-            ag=df["ag"][i],
-            e_c=df["Ec"][i],
-        )
-        # get the geometrical data
-        a = df["a"][i]
-        b = df["b"][i]
-        d = df["d"][i]
-        geo = Geometry(a=a, b=b, d=d)
-
-        # create beam data for the model
-        m0_model = Mdl_bcdMCFT(geo, mat, factors, r0_setting)
-        m1_model = Mdl_bcdMCFT(geo, mat, factors, r1_setting)
-        m2_model = NMdl_bcdMCFT(geo, mat, factors, r2_setting)
-
-        # calculate shear strength with original steel ratio
-        m0_vc_s, m0_beta, m0_e1, m0_theta, m0_ex = m0_model.getShearStrength_S()
-        df.loc[i, "m0_s"] = m0_vc_s
-        df.loc[i, "m0_b"] = m0_beta
-        df.loc[i, "m0_theta"] = m0_theta
-        m0_w = d * 0.9 * m0_e1 / math.sin(m0_theta)
-        df.loc[i, "m0_w"] = m0_w
-
-        m1_vc_s, m1_beta, m1_e1, m1_theta, m1_ex = m1_model.getShearStrength_S()
-        df.loc[i, "m1_theta"] = m1_theta
-        df.loc[i, "m1_s"] = m1_vc_s
-        df.loc[i, "m1_b"] = m1_beta
-        m1_w = d * 0.9 * m1_e1 / math.sin(m1_theta)
-        df.loc[i, "m1_w"] = m1_w
-
-        m2_vc_s, m2_beta, m2_e1, m2_theta, m2_ex = m2_model.getShearStrength_S()
-        df.loc[i, "m2_theta"] = m2_theta
-        df.loc[i, "m2_s"] = m2_vc_s
-        df.loc[i, "m2_b"] = m2_beta
-        m2_w = d * 0.9 * m2_e1 / math.sin(m2_theta)
-        df.loc[i, "m2_w"] = m2_w
-
-    return df
+    cols = {name: df[name].to_numpy(dtype=np.float64) for name in INPUT_COLS}
+    stats = None if batch else [cF.SolveStats() for m in MODEL_NAMES]
+    if workers is None and chunksize is None:
+        chunksize = max(len(df), 1)
+    start = time.perf_counter()
+    out, chunks = _process_chunks(
+        cols, fA, fB, gC, hE, batch, warm_start, workers, chunksize
+    )
+    report = {
+        "seconds": time.perf_counter() - start,
+        "workers": workers,
+        "chunks": chunks,
+    }
+    for chunk in chunks if stats else []:
+        for st, m in zip(stats, MODEL_NAMES):
+            st.n_ex += chunk["iterations"][m]["n_ex"]
+            st.n_e1 += chunk["iterations"][m]["n_e1"]
+    df_ret = df.assign(
+        **{
+            f"{m}_{name}": out[k, j]
+            for k, m in enumerate(MODEL_NAMES)
+            for j, name in enumerate(RESULT_NAMES)
+        }
+    )
+    df_ret.attrs["process_data"] = report
+    if stats is not None:
+        df_ret.attrs["iterations"] = _iterations(stats)
+    return df_ret
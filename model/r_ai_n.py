@@ -16,9 +16,12 @@ def f(d: float, af: float) -> float:
             return 0
         else:
             x = d / af
-            ret = 0.727 * (x**0.5) - x**2
-            ret += 0.144 * (x**4) + 0.036 * (x**6)
-            ret += 0.016 * (x**8) + 0.01 * (x**10)
+            x2 = x * x
+            x4 = x2 * x2
+            x8 = x4 * x4
+            ret = 0.727 * sqrt(x) - x2
+            ret += 0.144 * x4 + 0.036 * (x4 * x2)
+            ret += 0.016 * x8 + 0.01 * (x8 * x2)
             if ret < 0:
                 ret = 0
             return ret
@@ -46,8 +49,8 @@ def g1(d: float, w: float, delta: float) -> float:
     """function to consider the growing contact"""
     try:
         um = umax(d, w, delta)
-        ret = um**2
-        ret = ret / (d**3)
+        ret = um * um
+        ret = ret / (d * d * d)
         if ret < 0:
             ret = 0
     except:
@@ -65,7 +68,7 @@ def g2(d: float, w: float, delta: float) -> float:
         ret -= w * sqrt(d * d / 4 - w * w)
         ret += 0.25 * d * d * asin(2 * (um + w) / d)
         ret -= 0.25 * d * d * asin(2 * w / d)
-        ret = ret / (d**3)
+        ret = ret / (d * d * d)
         if ret < 0:
             ret = 0
     except:
@@ -76,8 +79,8 @@ def g2(d: float, w: float, delta: float) -> float:
 def g3(d: float, w: float, delta: float) -> float:
     """function to consider the maximum contact"""
     try:
-        ret = (d / 2 - w) ** 2
-        ret = ret / (d**3)
+        ret = (d / 2 - w) * (d / 2 - w)
+        ret = ret / (d * d * d)
         if ret < 0:
             ret = 0
     except:
@@ -90,7 +93,7 @@ def g4(d: float, w: float, delta: float) -> float:
     try:
         ret = d * d * pi / 8 - w * sqrt(d * d / 4 - w * w)
         ret -= 0.25 * d * d * asin(2 * w / d)
-        ret = ret / (d**3)
+        ret = ret / (d * d * d)
         if ret < 0:
             ret = 0
     except:
@@ -115,6 +118,181 @@ def findRange(x1, x2, xa, xb):
         return False, 0, 0
 
 
+# ARRAY-NATIVE VERSIONS OF THE KERNEL FUNCTIONS
+# d, w, delta (af) can be broadcastable arrays. Where the scalar versions raise and return 0
+# (division by zero, sqrt/asin out of domain), the array versions return 0 too.
+# The operations are the same as in the scalar versions, in the same order: +, -, *, /, sqrt are
+# correctly rounded and powers are written as products (NumPy's power loops differ from libm's pow
+# by 1 ulp), so f, supf, umax, g1, g3 are identical bit for bit. NumPy's arcsin may differ from
+# math.asin by 1 ulp, so g2 and g4 agree within a few ulp of their arcsin terms (d^2 asin(.) / 4 / d^3),
+# |g_np - g| <= 4 eps pi / (8 d), see tests/test_ai_kernels.py
+
+
+def _as_arrays(*args):
+    return tuple(np.asarray(a, dtype=np.float64) for a in args)
+
+
+def f_np(d, af):
+    """
+    array version of f(d, af)
+    """
+    d, af = np.asarray(d, dtype=np.float64), np.asarray(af, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = d / af
+        x2 = x * x
+        x4 = x2 * x2
+        x8 = x4 * x4
+        ret = 0.727 * np.sqrt(x) - x2
+        ret += 0.144 * x4 + 0.036 * (x4 * x2)
+        ret += 0.016 * x8 + 0.01 * (x8 * x2)
+    ret = np.where((af > 0) & (d <= af), np.maximum(ret, 0), 0)
+    return ret
+
+
+def supf_np(d, w, delta):
+    """
+    array version of supf(d, w, delta). It returns 0 where w = delta = 0
+    """
+    d, w, delta = _as_arrays(d, w, delta)
+    sq_dspl = w * w + delta * delta
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = d * d / sq_dspl - 1
+    ret = np.sqrt(np.clip(ret, 0, None))
+    return np.where(sq_dspl != 0, ret, 0)
+
+
+def umax_np(d, w, delta):
+    """
+    array version of umax(d, w, delta)
+    """
+    d, w, delta = _as_arrays(d, w, delta)
+    ret = (delta * supf_np(d, w, delta) - w) / 2
+    return np.clip(ret, 0, None)
+
+
+def g1_np(d, w, delta):
+    """array version of g1: function to consider the growing contact"""
+    d, w, delta = _as_arrays(d, w, delta)
+    ok = (d != 0) & (w * w + delta * delta != 0)
+    um = umax_np(d, w, delta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = um * um
+        ret = ret / (d * d * d)
+    return np.where(ok, np.clip(ret, 0, None), 0)
+
+
+def g2_np(d, w, delta):
+    """array version of g2: function to consider the growing contact"""
+    d, w, delta = _as_arrays(d, w, delta)
+    sf = supf_np(d, w, delta)
+    um = umax_np(d, w, delta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q1 = d * d / 4 - (w + um) * (w + um)
+        q2 = d * d / 4 - w * w
+        s1 = 2 * (um + w) / d
+        s2 = 2 * w / d
+        # the scalar g2 returns 0 when sqrt/asin are out of their domains
+        ok = (d != 0) & (w * w + delta * delta != 0)
+        ok &= (q1 >= 0) & (q2 >= 0) & (np.abs(s1) <= 1) & (np.abs(s2) <= 1)
+        q1, q2 = np.where(ok, q1, 0), np.where(ok, q2, 0)
+        s1, s2 = np.where(ok, s1, 0), np.where(ok, s2, 0)
+        ret = (delta - sf) * w * um
+        ret += (um + w) * np.sqrt(q1)
+        ret -= w * np.sqrt(q2)
+        ret += 0.25 * d * d * np.arcsin(s1)
+        ret -= 0.25 * d * d * np.arcsin(s2)
+        ret = ret / (d * d * d)
+    return np.where(ok, np.clip(ret, 0, None), 0)
+
+
+def g3_np(d, w, delta):
+    """array version of g3: function to consider the maximum contact"""
+    d, w, delta = _as_arrays(d, w, delta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = (d / 2 - w) * (d / 2 - w)
+        ret = ret / (d * d * d)
+    return np.where(d != 0, np.clip(ret, 0, None), 0)
+
+
+def g4_np(d, w, delta):
+    """array version of g4: function to consider the maximum contact"""
+    d, w, delta = _as_arrays(d, w, delta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = d * d / 4 - w * w
+        s = 2 * w / d
+        ok = (d != 0) & (q >= 0) & (np.abs(s) <= 1)
+        ret = d * d * pi / 8 - w * np.sqrt(np.where(ok, q, 0))
+        ret -= 0.25 * d * d * np.arcsin(np.where(ok, s, 0))
+        ret = ret / (d * d * d)
+    return np.where(ok, np.clip(ret, 0, None), 0)
+
+
+# FOR THE GAUSS-LEGENDRE ENGINE (axyCalType = 1)
+
+# root of the polynomial in f(): f(d, af) is clamped to zero for d > X0_F * af
+X0_F = 0.9047909219594481
+# number of Gauss-Legendre nodes on each sub-range
+N_GAUSS = 32
+# number of points integrated at once
+GL_CHUNK = 8192
+# bisection steps locating the zero of g2 (_positive_from)
+GL_BISECT = 16
+
+
+def _gauss_legendre01(n: int):
+    """
+    Gauss-Legendre nodes and weights mapped to [0,1]
+    """
+    x, wt = np.polynomial.legendre.leggauss(n)
+    return (x + 1) / 2, wt / 2
+
+
+_GL_T, _GL_W = _gauss_legendre01(N_GAUSS)
+
+
+def _gl_quad(g, sd, ed, w, delta, aa):
+    """
+    integrate f(d, aa) * g(d, w, delta) over [sd, ed] element-wise, with fixed-order Gauss-Legendre nodes.
+    Empty ranges (ed <= sd) contribute zero.
+    The substitution d = sd + (ed - sd) * t^2 removes the square-root behavior of g2/g4 at the lower limit
+    """
+    h = np.maximum(ed - sd, 0)[..., None]
+    d = sd[..., None] + h * (_GL_T**2)
+    wt = h * (2 * _GL_W * _GL_T)
+    v = f_np(d, aa[..., None]) * g(d, w[..., None], delta[..., None])
+    v = np.where(h > 0, v, 0)
+    return np.sum(v * wt, axis=-1)
+
+
+def _positive_from(g, sd, ed, w, delta):
+    """
+    the point of [sd, ed] from which g(d, w, delta) is positive, by bisection. g2 is negative near the
+    lower limit of its ranges and clipped to zero: integrating from there keeps the kink out of the
+    Gauss-Legendre range (with the kink inside, the error of Ax reaches 2e-5)
+    """
+    lo, hi = sd, np.maximum(ed, sd)
+    for _ in range(GL_BISECT):
+        mid = (lo + hi) / 2
+        pos = g(mid, w, delta) > 0
+        lo, hi = np.where(pos, lo, mid), np.where(pos, mid, hi)
+    return lo
+
+
+# names of the results of Conc_AI.calStresses_all, in order
+STRESS_NAMES = (
+    "ns_ai",
+    "ts_ai",
+    "ns_ai_c",
+    "ts_ai_c",
+    "ns_ai_f",
+    "ts_ai_f",
+    "ns",
+    "ts",
+    "ns_fr",
+    "ts_fr",
+)
+
+
 @dataclass
 class Conc_AI:
     pk: float = 0.75
@@ -132,6 +310,15 @@ class Conc_AI:
     FACTOR_shape: float = 1  # 1.23
     # 2024.06.18 - factor for friction caused by macro roughness
     Cf: float = 0.35
+    # engine to calculate Ax, Ay: 0 (scipy quad) or 1 (vectorized Gauss-Legendre, orgAxy_0_aa_gl).
+    # 1 is faster only for arrays of w, delta: a scalar call pays the NumPy overhead of the whole engine
+    # (~10 ms per calStresses_all against ~5 ms with quad), so the point-by-point callers
+    # (calMaxStresses_all, _genMonteCarlo) gain nothing from it, the *_np methods are the fast path
+    axyCalType: int = field(repr=False, default=0)
+
+    def __post_init__(self):
+        # constant terms (independent of w, delta), each stored with the parameters it was calculated from
+        self._cache = {}
 
     def data2dict(self) -> dict:
         return asdict(self)
@@ -171,43 +358,63 @@ class Conc_AI:
 
         return s
 
-    def __fc2sig_pu0(self):
+    def __fc2sig_pu0(self, fc=None):
         """
         calculate sig_pu from fc, based on Walraven - 1981
         """
-        _fcc = self.fc * self.FACTOR_fc2fcc
+        _fcc = (self.fc if fc is None else fc) * self.FACTOR_fc2fcc
         return 5.83 * (_fcc**0.63)
 
-    def __fc2sig_pu1(self):
+    def __fc2sig_pu1(self, fc=None):
         """
         calculate sig_pu from fc, based on Yang, Walraven, Uiji - 2016, ASCE
         """
-        _fcc = self.fc * self.FACTOR_fc2fcc
+        _fcc = (self.fc if fc is None else fc) * self.FACTOR_fc2fcc
         return 6.39 * (_fcc**0.56)
 
-    def __fc2sig_pu2(self):
+    def __fc2sig_pu2(self, fc=None):
         """
         calculate sig_pu from fc, based on suggested modification of Walraven, Reinhardt 1990 - Heron
         """
-        _fcc = self.fc * self.FACTOR_fc2fcc
+        _fcc = (self.fc if fc is None else fc) * self.FACTOR_fc2fcc
         return 4.76 * (_fcc**0.64)
 
+    def _cached(self, name: str, key: tuple, func):
+        """
+        return the constant term [name], which is recalculated by func() only when
+        its parameters (key) differ from those of the stored value, e.g. after ag or pv is reassigned
+        """
+        hit = self._cache.get(name)
+        if hit is not None and hit[0] == key:
+            return hit[1]
+        value = func()
+        self._cache[name] = (key, value)
+        return value
+
     def fc2sig_pu(self):
         """
         calculate sig_pu from fc, based on (1): Yang, Walraven, Uiji - 2016, ASCE, or (0): Walraven - 1981
         """
+        key = (self.fc, self.FACTOR_fc2fcc, self.sig_puCalType)
+        return self._cached("fc2sig_pu", key, self.__fc2sig_pu)
+
+    def __fc2sig_pu(self, fc=None):
         if self.sig_puCalType == 0:
-            f = self.__fc2sig_pu0()
+            f = self.__fc2sig_pu0(fc)
         elif self.sig_puCalType == 1:
-            f = self.__fc2sig_pu1()
+            f = self.__fc2sig_pu1(fc)
         else:
-            f = self.__fc2sig_pu2()
+            f = self.__fc2sig_pu2(fc)
         return f
 
     def orgL_A(self, aa: float):
         """
         calculate unit expected length-area caused by aggregates in [0,aa] without considering (pv,pvf)
         """
+        key = (self.pk, self.ag, aa)
+        return self._cached("orgL_A", key, lambda: self.__orgL_A(aa))
+
+    def __orgL_A(self, aa: float):
         sd, ed = 0, aa
         fD = lambda d: self.pk * f(d, aa) * sqrt(aa / self.ag) / d
         ret = integrate.quad(fD, sd, ed)[0]
@@ -227,6 +434,13 @@ class Conc_AI:
             l_ret = integrate.quad(fD, sd, ed)[0]
         return l_ret
 
+    def _sqrt_aa_ag(self, aa: float):
+        """
+        the factor sqrt(aa/ag), kept for aa = ag (all aggregates) and aa < ag (fine aggregates)
+        """
+        name = "sqrt_aa_ag_all" if aa == self.ag else "sqrt_aa_ag"
+        return self._cached(name, (aa, self.ag), lambda: sqrt(aa / self.ag))
+
     def orgAxy_0_aa(self, w: float, delta: float, aa: float):
         """
         calculate original Ax, Ay contributed by aggregate sizes [0,aa]. It means that pv is not considered
@@ -235,6 +449,7 @@ class Conc_AI:
         ag = self.ag
         d1 = 0
         d2 = aa
+        sqrt_aa_ag = self._sqrt_aa_ag(aa)
         if delta < w:  # case A
             if delta == 0.00:
                 delta = 0.00001
@@ -246,11 +461,11 @@ class Conc_AI:
             if valid:
                 fAy = lambda d: f(d, aa) * g1(d, w, delta)
                 aAy = integrate.quad(fAy, sd, ed)[0]
-                aAy = aAy * (4 * pk / pi) * sqrt(aa / ag)
+                aAy = aAy * (4 * pk / pi) * sqrt_aa_ag
 
                 fAx = lambda d: f(d, aa) * g2(d, w, delta)
                 aAx = integrate.quad(fAx, sd, ed)[0]
-                aAx = aAx * (4 * pk / pi) * sqrt(aa / ag)
+                aAx = aAx * (4 * pk / pi) * sqrt_aa_ag
             else:
                 aAx = 0
                 aAy = 0
@@ -280,11 +495,67 @@ class Conc_AI:
                 fAx2 = lambda d: f(d, aa) * g2(d, w, delta)
                 aAx += integrate.quad(fAx2, sd2, ed2)[0]
 
-            aAy = aAy * (4 * pk / pi) * sqrt(aa / ag)
-            aAx = aAx * (4 * pk / pi) * sqrt(aa / ag)
+            aAy = aAy * (4 * pk / pi) * sqrt_aa_ag
+            aAx = aAx * (4 * pk / pi) * sqrt_aa_ag
 
         return aAx * self.FACTOR_shape, aAy * self.FACTOR_shape
 
+    def orgAxy_0_aa_gl(self, w, delta, aa, ag=None):
+        """
+        vectorized version of orgAxy_0_aa: w, delta, aa (and ag, self.ag by default) can be broadcastable arrays.
+        Every valid sub-range is integrated with N_GAUSS Gauss-Legendre nodes, and the upper limit is cut at
+        X0_F * aa where f() becomes zero, so the integrand is smooth on every sub-range.
+
+        The integration of g2 starts where it becomes positive (_positive_from), past the kink of its clip.
+
+        Max deviation on w in [0.01,1.6] x delta in [0,2], ag = 20, aa = ag or af = 4.75:
+        from a converged reference (2048 nodes) |dAx|, |dAy| < 3e-8; from orgAxy_0_aa (quad) < 5e-6
+        (about 1.5e-5 of the peak values), which is the error of quad itself in case B
+        """
+        w, delta, aa, ag = np.broadcast_arrays(
+            *_as_arrays(w, delta, aa, self.ag if ag is None else ag)
+        )
+        shape = w.shape
+        w, delta, aa, ag = w.ravel(), delta.ravel(), aa.ravel(), ag.ravel()
+        # limit the size of the (points x nodes) temporaries
+        aAx, aAy = np.empty_like(w), np.empty_like(w)
+        for s in range(0, w.size, GL_CHUNK):
+            e = s + GL_CHUNK
+            aAx[s:e], aAy[s:e] = self.__orgAxy_gl(w[s:e], delta[s:e], aa[s:e], ag[s:e])
+        return aAx.reshape(shape)[()], aAy.reshape(shape)[()]
+
+    def __orgAxy_gl(self, w, delta, aa, ag):
+        pk = self.pk
+        # the range [0,aa], limited to where f() is positive
+        d2 = np.minimum(aa, X0_F * aa)
+        aAx, aAy = np.empty_like(w), np.empty_like(w)
+        # each case on its own points only
+        caseA = delta < w
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # case A (delta < w)
+            i = np.flatnonzero(caseA)
+            w_, delta_, aa_ = w[i], np.where(delta[i] == 0.00, 0.00001, delta[i]), aa[i]
+            sdA = np.maximum((w_ * w_ + delta_ * delta_) / delta_, 0)
+            edA = np.minimum(ag[i], d2[i])
+            aAy[i] = _gl_quad(g1_np, sdA, edA, w_, delta_, aa_)
+            sdA_g2 = _positive_from(g2_np, sdA, edA, w_, delta_)
+            aAx[i] = _gl_quad(g2_np, sdA_g2, edA, w_, delta_, aa_)
+            # case B (delta > w)
+            i = np.flatnonzero(~caseA)
+            w_, delta_, aa_ = w[i], delta[i], aa[i]
+            edB1 = (w_ * w_ + delta_ * delta_) / w_
+            sdB1, edB1 = np.maximum(2 * w_, 0), np.minimum(edB1, d2[i])
+            sdB2 = np.maximum((w_ * w_ + delta_ * delta_) / w_, 0)
+            edB2 = np.minimum(ag[i], d2[i])
+            aAyB = _gl_quad(g3_np, sdB1, edB1, w_, delta_, aa_)
+            aAy[i] = aAyB + _gl_quad(g1_np, sdB2, edB2, w_, delta_, aa_)
+            aAxB = _gl_quad(g4_np, sdB1, edB1, w_, delta_, aa_)
+            sdB2_g2 = _positive_from(g2_np, sdB2, edB2, w_, delta_)
+            aAx[i] = aAxB + _gl_quad(g2_np, sdB2_g2, edB2, w_, delta_, aa_)
+
+        factor = (4 * pk / pi) * np.sqrt(aa / ag) * self.FACTOR_shape
+        return aAx * factor, aAy * factor
+
     def calAxy(self, w: float, delta: float):
         """
         calculate Ax,Ay of coarse and fine aggregates
@@ -293,12 +564,18 @@ class Conc_AI:
         - Ax_f, Ay_f: for fine aggregates, with pvf
 
         return nAx_c, nAy_c, oAx_f, oAy_f
+
+        with axyCalType = 1, w and delta can be arrays (for scalars, the engine is slower than quad)
         """
+        if self.axyCalType == 1:
+            orgAxy = self.orgAxy_0_aa_gl
+        else:
+            orgAxy = self.orgAxy_0_aa
         # Ax, Ay caused by all aggregates without considering pv (pv=1) - same as Walraven
-        oAx_all, oAy_all = self.orgAxy_0_aa(w=w, delta=delta, aa=self.ag)
+        oAx_all, oAy_all = orgAxy(w=w, delta=delta, aa=self.ag)
         # Ax, Ay caused by fine aggregates without considering pv (pv=1) - aggregates in [0,af]
         aa_f = min(self.af, self.ag)
-        oAx_f, oAy_f = self.orgAxy_0_aa(w=w, delta=delta, aa=aa_f)
+        oAx_f, oAy_f = orgAxy(w=w, delta=delta, aa=aa_f)
         # Ax, Ay caused by coarse aggregates without considering pv (pv=1)
         oAx_c, oAy_c = oAx_all - oAx_f, oAy_all - oAy_f
 
@@ -372,6 +649,58 @@ class Conc_AI:
         # return values
         return ns_ai, ts_ai, ns_ai_c, ts_ai_c, ns_ai_f, ts_ai_f, ns, ts, ns_fr, ts_fr
 
+    def calStresses_all_np(self, w, delta, ag=None, pv=None, fc=None, pvf=None):
+        """
+        array version of calStresses_all, calculated with the Gauss-Legendre engine.
+        w, delta, ag, pv, fc, pvf are broadcastable arrays, (ag, pv, fc, pvf) are taken from self if not given.
+        Contact areas are only integrated over the broadcast shape of (w, delta, ag)
+
+        return: ns_ai, ts_ai, ns_ai_c, ts_ai_c, ns_ai_f, ts_ai_f, ns, ts, ns_fr, ts_fr
+        """
+        ag = self.ag if ag is None else ag
+        pv = self.pv if pv is None else pv
+        pvf = self.pvf if pvf is None else pvf
+        w, delta, ag, pv, pvf = _as_arrays(w, delta, ag, pv, pvf)
+        sig_pu = self.__fc2sig_pu(fc)
+        muy = self.muy
+        # contact areas
+        oAx_all, oAy_all = self.orgAxy_0_aa_gl(w=w, delta=delta, aa=ag, ag=ag)
+        aa_f = np.minimum(self.af, ag)
+        oAx_f, oAy_f = self.orgAxy_0_aa_gl(w=w, delta=delta, aa=aa_f, ag=ag)
+        oAx_c, oAy_c = oAx_all - oAx_f, oAy_all - oAy_f
+        aAx_f, aAy_f = pvf * oAx_f, pvf * oAy_f
+        aAx_c, aAy_c = pv * oAx_c, pv * oAy_c
+
+        # streses caused by aggregate interlocking
+        ns_ai_c = sig_pu * (aAx_c - muy * aAy_c)
+        ts_ai_c = sig_pu * (aAy_c + muy * aAx_c)
+        ns_ai_f = sig_pu * (aAx_f - muy * aAy_f)
+        ts_ai_f = sig_pu * (aAy_f + muy * aAx_f)
+        ns_ai = ns_ai_c + ns_ai_f
+        ts_ai = ts_ai_c + ts_ai_f
+
+        # stresses caused by friction of macro roughness
+        #   orgL_A(af) is proportional to sqrt(af/ag)
+        l_ai_f0 = self.orgL_A(aa=self.af) * np.sqrt(self.ag / ag)
+        l_ai_c0 = self.pk - l_ai_f0
+        l_fr_ma = 1 - (l_ai_f0 * pvf + l_ai_c0 * pv)
+        #   stresses according to original Walraven, assuming that no aggregate-cutting fracture
+        with np.errstate(divide="ignore", invalid="ignore"):
+            aAx_c0 = np.where(pv > 0, aAx_c / pv, aAx_c)
+            aAy_c0 = np.where(pv > 0, aAy_c / pv, aAy_c)
+            aAx_f0 = np.where(pvf > 0, aAx_f / pvf, aAx_f)
+            aAy_f0 = np.where(pvf > 0, aAy_f / pvf, aAy_f)
+        aAx0, aAy0 = aAx_c0 + aAx_f0, aAy_c0 + aAy_f0
+        ns0 = sig_pu * (aAx0 - muy * aAy0)
+        ts0 = sig_pu * (aAy0 + muy * aAx0)
+
+        ns_fr, ts_fr = ns0 * self.Cf * l_fr_ma, ts0 * self.Cf * l_fr_ma
+
+        # combined stresses
+        ns, ts = ns_ai + ns_fr, ts_ai + ts_fr
+
+        return ns_ai, ts_ai, ns_ai_c, ts_ai_c, ns_ai_f, ts_ai_f, ns, ts, ns_fr, ts_fr
+
     def calMaxStresses_ai(self, w: float):
         """
         calculate the maximum stresses - along with the maximum contact of aggregate interlock
@@ -431,6 +760,21 @@ class Conc_AI:
             delta,
         )
 
+    def calMaxStresses_all_np(self, w, ag=None, pv=None, fc=None, pvf=None):
+        """
+        array version of calMaxStresses_all, calculated with the Gauss-Legendre engine.
+        w, ag, pv, fc, pvf are broadcastable arrays, (ag, pv, fc, pvf) are taken from self if not given
+        """
+        ag = self.ag if ag is None else ag
+        w, ag = _as_arrays(w, ag)
+        # same as calMaxStresses_all: zero stresses and delta = 10000 where w * ag - w * w < 0
+        t = w * ag - w * w
+        valid = t >= 0
+        delta = np.sqrt(np.where(valid, t, 0))
+        rets = self.calStresses_all_np(w=w, delta=delta, ag=ag, pv=pv, fc=fc, pvf=pvf)
+        rets = tuple(np.where(valid, r, 0)[()] for r in rets)
+        return rets + (np.where(valid, delta, 10000)[()],)
+
 
 class AI_Calculate:
     @staticmethod
@@ -495,3 +839,45 @@ class AI_Calculate:
         )
 
         return df_ret
+
+    @staticmethod
+    def calStress_grid(
+        conc: Conc_AI,
+        ws: np.array,
+        deltas: np.array,
+        ags: np.array = None,
+        pvs: np.array = None,
+        fcs: np.array = None,
+    ) -> dict:
+        """
+        return the basic results on the full grid of [ags x pvs x fcs x] ws x deltas, calculated at once
+        with the Gauss-Legendre engine, as a dict of
+        - "dims": names of the grid axes, e.g. ("w", "delta") or ("ag", "pv", "w", "delta")
+        - one 1-D coordinate array for every axis
+        - one array of shape (len(axis) for axis in dims) for every result (ns_ai, ..., ts_fr)
+        ags, pvs, fcs are optional, the values of conc are used for those not given
+        """
+        coords = {}
+        for name, values in (("ag", ags), ("pv", pvs), ("fc", fcs)):
+            if values is not None:
+                coords[name] = np.asarray(values, dtype=np.float64).ravel()
+        coords["w"] = np.asarray(ws, dtype=np.float64).ravel()
+        coords["delta"] = np.asarray(deltas, dtype=np.float64).ravel()
+        dims = tuple(coords)
+        grid = dict(
+            zip(dims, np.meshgrid(*coords.values(), indexing="ij", sparse=True))
+        )
+
+        rets = conc.calStresses_all_np(
+            w=grid["w"],
+            delta=grid["delta"],
+            ag=grid.get("ag"),
+            pv=grid.get("pv"),
+            fc=grid.get("fc"),
+        )
+        shape = tuple(len(c) for c in coords.values())
+        ret = {"dims": dims, **coords}
+        ret.update(
+            (name, np.broadcast_to(r, shape)) for name, r in zip(STRESS_NAMES, rets)
+        )
+        return ret
@@ -0,0 +1,159 @@
+from copy import deepcopy
+import numpy as np
+import pandas as pd
+from model.r_ai_n import Conc_AI, AI_Calculate, STRESS_NAMES
+from model.r_ai_mcft import vci_mcft
+
+# engines of the sweeps: "exact" calls the scalar methods of Conc_AI point by point (its axyCalType),
+# "batch" evaluates the whole grid at once with the Gauss-Legendre kernels (calStresses_all_np ...)
+SWEEP_ENGINES = ("exact", "batch")
+
+# columns of the results of the sweeps, in order
+PV_COLS = ("pv", "w", "delta", "ns", "ts")
+MAX_AG_COLS = ("ag", "w", "delta_m", "tsW", "ts_ai_c", "ts_ai_f", "ts_fr", "ts")
+MAX_AG_PV_COLS = (
+    "ag",
+    "pv",
+    "w",
+    "ts_ai_c",
+    "ts_ai_f",
+    "ts_ai",
+    "ts",
+    "ts_fr",
+    "tsW",
+    "tsW0",
+    "ts_mcft",
+)
+
+# positions of the results of calMaxStresses_all / calMaxStresses_ai
+_MAX = {name: i for i, name in enumerate(STRESS_NAMES + ("delta",))}
+
+
+def _check_engine(engine: str):
+    if engine not in SWEEP_ENGINES:
+        raise ValueError(f"engine must be in {SWEEP_ENGINES}: {engine}")
+
+
+def _axes(*values) -> list:
+    return [np.asarray(v, dtype=np.float64).ravel() for v in values]
+
+
+def _frame(axes: dict, values: dict) -> pd.DataFrame:
+    """
+    one float64 DataFrame from the grid axes {name: 1-D array} (the last one varying fastest)
+    and values {name: array of the grid shape}
+    """
+    shape = tuple(len(a) for a in axes.values())
+    grid = np.meshgrid(*axes.values(), indexing="ij")
+    cols = dict(zip(axes, (g.ravel() for g in grid)))
+    cols.update((name, np.broadcast_to(v, shape).ravel()) for name, v in values.items())
+    return pd.DataFrame(cols)
+
+
+def _walraven(conc: Conc_AI):
+    """the concretes of Walraven 1990 (pv = 1) and 1981 (pv = 1, sig_puCalType = 0) for conc"""
+    concW = deepcopy(conc)
+    concW.pv = 1
+    concW0 = deepcopy(concW)
+    concW0.sig_puCalType = 0
+    return concW, concW0
+
+
+def sweep_stresses_pv(
+    conc: Conc_AI, pvs, ws, deltas, engine: str = "exact"
+) -> pd.DataFrame:
+    """
+    ns and ts of conc on the grid pvs x ws x deltas (pg000_f01)
+
+    return: DataFrame of PV_COLS, one row per point, deltas varying fastest
+    """
+    _check_engine(engine)
+    pvs, ws, deltas = _axes(pvs, ws, deltas)
+    axes = {"pv": pvs, "w": ws, "delta": deltas}
+    if engine == "batch":
+        ret = AI_Calculate.calStress_grid(conc, ws, deltas, pvs=pvs)
+        return _frame(axes, {"ns": ret["ns"], "ts": ret["ts"]})
+
+    conc = deepcopy(conc)
+    shape = (len(pvs), len(ws), len(deltas))
+    ns, ts = np.empty(shape), np.empty(shape)
+    for i, pv in enumerate(pvs):
+        conc.pv = pv
+        for j, w in enumerate(ws):
+            for k, delta in enumerate(deltas):
+                rets = conc.calStresses_all(w=w, delta=delta)
+                ns[i, j, k], ts[i, j, k] = rets[6], rets[7]
+    return _frame(axes, {"ns": ns, "ts": ts})
+
+
+def sweep_max_ag(conc: Conc_AI, ags, ws, engine: str = "exact") -> pd.DataFrame:
+    """
+    max stresses of conc (calMaxStresses_all) and of Walraven 1990 (tsW) on the grid ags x ws (pg000_f02)
+
+    return: DataFrame of MAX_AG_COLS, one row per point, ws varying fastest
+    """
+    _check_engine(engine)
+    ags, ws = _axes(ags, ws)
+    axes = {"ag": ags, "w": ws}
+    names = ("delta", "ts_ai_c", "ts_ai_f", "ts_fr", "ts")
+    concW, _ = _walraven(conc)
+    if engine == "batch":
+        ag, w = ags[:, None], ws[None, :]
+        rets = conc.calMaxStresses_all_np(w=w, ag=ag)
+        values = {name: rets[_MAX[name]] for name in names}
+        values["tsW"] = concW.calMaxStresses_all_np(w=w, ag=ag)[_MAX["ts_ai"]]
+    else:
+        conc = deepcopy(conc)
+        values = {name: np.empty((len(ags), len(ws))) for name in names + ("tsW",)}
+        for i, ag in enumerate(ags):
+            conc.ag = ag
+            concW.ag = ag
+            for j, w in enumerate(ws):
+                values["tsW"][i, j] = concW.calMaxStresses_ai(w=w)[1]
+                rets = conc.calMaxStresses_all(w)
+                for name in names:
+                    values[name][i, j] = rets[_MAX[name]]
+    values["delta_m"] = values.pop("delta")
+    return _frame(axes, {name: values[name] for name in MAX_AG_COLS[2:]})
+
+
+def sweep_max_ag_pv(conc: Conc_AI, ags, pvs, ws, engine: str = "exact") -> pd.DataFrame:
+    """
+    max shear stresses of conc (m_2P), of Walraven 1990 (tsW) and 1981 (tsW0), and of MCFT (ts_mcft)
+    on the grid ags x pvs x ws (pg000_f03)
+
+    return: DataFrame of MAX_AG_PV_COLS, one row per point, ws varying fastest
+    """
+    _check_engine(engine)
+    ags, pvs, ws = _axes(ags, pvs, ws)
+    axes = {"ag": ags, "pv": pvs, "w": ws}
+    names = ("ts_ai_c", "ts_ai_f", "ts_ai", "ts", "ts_fr")
+    concW, concW0 = _walraven(conc)
+    if engine == "batch":
+        ag, pv, w = ags[:, None, None], pvs[None, :, None], ws[None, None, :]
+        rets = conc.calMaxStresses_all_np(w=w, ag=ag, pv=pv)
+        values = {name: rets[_MAX[name]] for name in names}
+        # Walraven does not depend on pv
+        values["tsW"] = concW.calMaxStresses_all_np(w=w, ag=ag)[_MAX["ts_ai"]]
+        values["tsW0"] = concW0.calMaxStresses_all_np(w=w, ag=ag)[_MAX["ts_ai"]]
+    else:
+        conc = deepcopy(conc)
+        shape = (len(ags), len(pvs), len(ws))
+        values = {name: np.empty(shape) for name in names + ("tsW", "tsW0")}
+        for i, ag in enumerate(ags):
+            conc.ag = ag
+            concW.ag = ag
+            concW0.ag = ag
+            # Walraven does not depend on pv
+            tsW = [concW.calMaxStresses_ai(w=w)[1] for w in ws]
+            tsW0 = [concW0.calMaxStresses_ai(w=w)[1] for w in ws]
+            for j, pv in enumerate(pvs):
+                conc.pv = pv
+                values["tsW"][i, j] = tsW
+                values["tsW0"][i, j] = tsW0
+                for k, w in enumerate(ws):
+                    rets = conc.calMaxStresses_all(w)
+                    for name in names:
+                        values[name][i, j, k] = rets[_MAX[name]]
+    values["ts_mcft"] = vci_mcft(conc.fc, ags[:, None, None], ws[None, None, :], pv=1)
+    return _frame(axes, {name: values[name] for name in MAX_AG_PV_COLS[3:]})
@@ -0,0 +1,203 @@
+from dataclasses import dataclass, field
+import json
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+from model.r_ai_n import Conc_AI, STRESS_NAMES
+
+# possible axes of the table, in order
+TABLE_AXES = ("fc", "ag", "pv", "pvf", "w")
+# names of the results of Conc_AI.calMaxStresses_all, in order
+MAX_NAMES = STRESS_NAMES + ("delta",)
+
+
+def _axis(r) -> np.ndarray:
+    """
+    an axis from (min, max, n) or from given values
+    """
+    if isinstance(r, tuple) and len(r) == 3:
+        return np.linspace(r[0], r[1], int(r[2]), endpoint=True)
+    return np.asarray(r, dtype=np.float64).ravel()
+
+
+def _refine(a: np.ndarray) -> np.ndarray:
+    """
+    double the resolution of an axis, keeping its nodes
+    """
+    mids = (a[1:] + a[:-1]) / 2
+    return np.insert(a, np.arange(1, len(a)), mids)
+
+
+@dataclass
+class AI_MaxTable:
+    """
+    tabulated response surface of Conc_AI.calMaxStresses_all over some of (fc, ag, pv, pvf, w),
+    the other parameters being fixed to those of conc. Values are tabulated once with the
+    Gauss-Legendre engine and served by RegularGridInterpolator
+    """
+
+    conc: dict  # Conc_AI.data2dict() of the tabulated concrete
+    axes: (
+        dict  # {name: 1-D array} for the varying parameters, in the order of TABLE_AXES
+    )
+    values: np.ndarray  # shape (*lengths of axes, len(MAX_NAMES))
+    method: str = (
+        "linear"  # "linear" (multilinear), "cubic", ... of RegularGridInterpolator
+    )
+    # the result of the last spot_check
+    error: dict = field(default=None, repr=False)
+
+    def __post_init__(self):
+        self._interp = RegularGridInterpolator(
+            tuple(self.axes.values()), self.values, method=self.method
+        )
+
+    @classmethod
+    def build(
+        cls,
+        conc: Conc_AI,
+        axes: dict,
+        method: str = "linear",
+        tol: float = None,
+        n_check: int = 200,
+        max_refine: int = 2,
+        seed: int = 0,
+    ):
+        """
+        tabulate calMaxStresses_all(w) for conc over axes = {name: (min, max, n) or values},
+        names in TABLE_AXES, "w" is required. Parameters not in axes are kept as in conc.
+
+        If tol is given, the table is checked against n_check exact points (spot_check), and the resolution
+        of all axes is doubled (at most max_refine times) until the max abs error of ts is below tol.
+        The results are linear in pv and pvf: 2 nodes are exact for those axes with method "linear"
+        """
+        unknown = set(axes) - set(TABLE_AXES)
+        if unknown or "w" not in axes:
+            raise ValueError(
+                f"axes must include 'w' and be in {TABLE_AXES}: {list(axes)}"
+            )
+        t_axes = {name: _axis(axes[name]) for name in TABLE_AXES if name in axes}
+        for i in range(max_refine + 1):
+            table = cls(conc.data2dict(), t_axes, cls.__tabulate(conc, t_axes), method)
+            if tol is None:
+                break
+            table.spot_check(n=n_check, seed=seed)
+            if table.error["max_abs"]["ts"] < tol:
+                break
+            if i == max_refine:
+                raise ValueError(
+                    f"max error of ts {table.error['max_abs']['ts']:.3g} > tol {tol} after {max_refine} refinements"
+                )
+            t_axes = {name: _refine(a) for name, a in t_axes.items()}
+        return table
+
+    @staticmethod
+    def __tabulate(conc: Conc_AI, axes: dict) -> np.ndarray:
+        grid = dict(zip(axes, np.meshgrid(*axes.values(), indexing="ij", sparse=True)))
+        rets = conc.calMaxStresses_all_np(
+            w=grid["w"],
+            ag=grid.get("ag"),
+            pv=grid.get("pv"),
+            fc=grid.get("fc"),
+            pvf=grid.get("pvf"),
+        )
+        shape = tuple(len(a) for a in axes.values())
+        return np.stack([np.broadcast_to(r, shape) for r in rets], axis=-1)
+
+    def calMaxStresses_all(self, w, fc=None, ag=None, pv=None, pvf=None):
+        """
+        interpolated calMaxStresses_all: the tabulated parameters are broadcastable arrays,
+        those not given take the values of the tabulated concrete. Points outside the table raise ValueError
+
+        return: ns_ai, ts_ai, ns_ai_c, ts_ai_c, ns_ai_f, ts_ai_f, ns, ts, ns_fr, ts_fr, delta
+        """
+        given = {"fc": fc, "ag": ag, "pv": pv, "pvf": pvf, "w": w}
+        for name, v in given.items():
+            if name not in self.axes and v is not None and np.any(v != self.conc[name]):
+                raise ValueError(
+                    f"{name} is not tabulated, it is fixed to {self.conc[name]}"
+                )
+        pts = [
+            self.conc[name] if given[name] is None else given[name]
+            for name in self.axes
+        ]
+        pts = np.broadcast_arrays(*[np.asarray(p, dtype=np.float64) for p in pts])
+        rets = self._interp(np.stack(pts, axis=-1))
+        return tuple(rets[..., i][()] for i in range(len(MAX_NAMES)))
+
+    def check_conc(self, conc: Conc_AI, varying=()):
+        """
+        raise ValueError if conc differs from the tabulated concrete on a parameter that is neither
+        tabulated nor in varying (given point by point, e.g. the sampled fc, ag, pv). axyCalType is
+        left out as it only selects the engine
+        """
+        ignore = set(self.axes) | set(varying) | {"axyCalType"}
+        diff = {
+            name: (v, self.conc.get(name))
+            for name, v in conc.data2dict().items()
+            if name not in ignore and self.conc.get(name) != v
+        }
+        if diff:
+            raise ValueError(
+                f"the table was built for another concrete, (given, tabulated): {diff}"
+            )
+
+    def spot_check(self, n: int = 200, seed: int = 0) -> dict:
+        """
+        compare the table with the exact calMaxStresses_all (scipy quad) at n random points in its range.
+        The result is also kept in self.error
+
+        return {"n", "max_abs": {name: error}, "max_rel": {name: error / largest exact value},
+                "worst": {name of axis: value at the max abs error of ts}}
+        """
+        rng = np.random.default_rng(seed)
+        pts = {name: rng.uniform(a[0], a[-1], n) for name, a in self.axes.items()}
+        approx = np.stack(
+            self.calMaxStresses_all(**{k: v for k, v in pts.items()}), axis=-1
+        )
+        conc = Conc_AI(**{**self.conc, "axyCalType": 0})
+        exact = np.empty_like(approx)
+        for i in range(n):
+            for name, v in pts.items():
+                if name != "w":
+                    setattr(conc, name, v[i])
+            exact[i] = conc.calMaxStresses_all(w=pts["w"][i])
+
+        err = np.abs(approx - exact)
+        scale = np.abs(exact).max(axis=0)
+        its = MAX_NAMES.index("ts")
+        worst = int(np.argmax(err[:, its]))
+        self.error = {
+            "n": n,
+            "max_abs": dict(zip(MAX_NAMES, err.max(axis=0).tolist())),
+            "max_rel": dict(
+                zip(
+                    MAX_NAMES,
+                    (err.max(axis=0) / np.where(scale > 0, scale, 1)).tolist(),
+                )
+            ),
+            "worst": {name: float(v[worst]) for name, v in pts.items()},
+        }
+        return self.error
+
+    def save(self, path: str):
+        """save the table to a .npz file"""
+        np.savez_compressed(
+            path,
+            values=self.values,
+            conc=json.dumps(self.conc),
+            method=self.method,
+            **{f"axis_{name}": a for name, a in self.axes.items()},
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        """load a table saved by save()"""
+        with np.load(path) as data:
+            axes = {
+                name: data[f"axis_{name}"]
+                for name in TABLE_AXES
+                if f"axis_{name}" in data.files
+            }
+            return cls(
+                json.loads(str(data["conc"])), axes, data["values"], str(data["method"])
+            )
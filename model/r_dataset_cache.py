@@ -0,0 +1,121 @@
+import functools
+import hashlib
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+
+# folder of the cache, and its size cap in MB (least recently used entries are removed first)
+CACHE_DIR = os.environ.get(
+    "BCD_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bcd_hu_utc")
+)
+CACHE_MAX_MB = float(os.environ.get("BCD_CACHE_MAX_MB", 1024))
+
+
+def dataset_key(**params) -> str:
+    """
+    content address of a dataset: sha256 of its generating parameters (JSON-able values)
+    """
+    text = json.dumps(params, sort_keys=True, default=float)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def array_digest(*arrays) -> str:
+    """sha256 of the contents of arrays, to put large arrays in a dataset_key"""
+    h = hashlib.sha256()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(str((a.dtype, a.shape)).encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def source_digest(*modules) -> str:
+    """
+    sha256 of the source files of modules, to put in a dataset_key so that the datasets cached
+    by an older version of the code generating them are not reused
+    """
+    h = hashlib.sha256()
+    for m in modules:
+        with open(m.__file__, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _entry(key: str, folder: str = None) -> str:
+    return os.path.join(folder or CACHE_DIR, key)
+
+
+def load(key: str, folder: str = None, mmap_mode: str = None):
+    """
+    return (X, y) cached under key, or None. A hit marks the entry as recently used
+    """
+    path = _entry(key, folder)
+    try:
+        X = np.load(os.path.join(path, "X.npy"), mmap_mode=mmap_mode)
+        y = np.load(os.path.join(path, "y.npy"), mmap_mode=mmap_mode)
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    return X, y
+
+
+def new_entry(folder: str = None) -> str:
+    """a private folder to write an entry into, before commit()"""
+    path = _entry(f".tmp-{uuid.uuid4().hex}", folder)
+    os.makedirs(path)
+    return path
+
+
+def commit(key: str, path: str, folder: str = None):
+    """
+    publish the entry written in path (by new_entry) under key, then prune the cache.
+    If another process has published the same key meanwhile, path is discarded
+    """
+    try:
+        os.replace(path, _entry(key, folder))
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+    prune(folder, keep=key)
+
+
+def store(key: str, X: np.ndarray, y: np.ndarray, folder: str = None):
+    """cache (X, y) under key"""
+    path = new_entry(folder)
+    np.save(os.path.join(path, "X.npy"), X)
+    np.save(os.path.join(path, "y.npy"), y)
+    commit(key, path, folder)
+
+
+def _size(path: str) -> int:
+    return sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+
+
+def prune(folder: str = None, max_mb: float = None, keep: str = None):
+    """
+    remove the least recently used entries until the cache is below max_mb (CACHE_MAX_MB), except keep
+    """
+    folder = folder or CACHE_DIR
+    max_bytes = (CACHE_MAX_MB if max_mb is None else max_mb) * 2**20
+    try:
+        entries = [
+            e for e in os.scandir(folder) if e.is_dir() and not e.name.startswith(".")
+        ]
+    except OSError:
+        return
+    entries = sorted(entries, key=lambda e: e.stat().st_mtime)
+    sizes = [_size(e.path) for e in entries]
+    total = sum(sizes)
+    for e, size in zip(entries, sizes):
+        if total <= max_bytes:
+            break
+        if e.name != keep:
+            shutil.rmtree(e.path, ignore_errors=True)
+            total -= size
+
+
+def clear(folder: str = None):
+    """remove all entries of the cache"""
+    shutil.rmtree(folder or CACHE_DIR, ignore_errors=True)
@@ -1,8 +1,18 @@
+import os
 import random
+import sys
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 from model.r_ai_n import *
+from model.r_ai_table import AI_MaxTable
+import model.r_ai_n
+import model.r_ai_table
+import model.r_dataset_cache as dataset_cache
 from scipy.optimize import curve_fit
+from scipy.stats import qmc
 import sklearn.metrics as metrics
 import matplotlib.pyplot as plt
 
@@ -14,6 +24,228 @@ def _metrics_results(y, yhat):
     return mape, smape, r2
 
 
+def _cal_ts_chunk(conc_data: dict, fcs, ags, pvs, ws) -> np.ndarray:
+    """
+    calculate ts = calMaxStresses_all(w)[7] for a chunk of samples, with a Conc_AI of its own
+    """
+    conc = Conc_AI(**conc_data)
+    ts = np.empty(len(ws), dtype=np.float64)
+    for i in range(len(ws)):
+        conc.fc = fcs[i]
+        conc.ag = ags[i]
+        conc.pv = pvs[i]
+        ts[i] = conc.calMaxStresses_all(w=ws[i])[7]
+    return ts
+
+
+def _cal_ts(
+    conc: Conc_AI, fcs, ags, pvs, ws, workers: int = None, executor=None
+) -> np.ndarray:
+    """
+    calculate ts for all samples, in a pool of [workers] processes if workers > 1 (executor, if given).
+    Samples are split into contiguous chunks and gathered in order, so the results do not depend on workers
+    """
+    conc_data = conc.data2dict()
+    if workers is None or workers <= 1:
+        return _cal_ts_chunk(conc_data, fcs, ags, pvs, ws)
+    n_chunks = min(len(ws), workers * 4)
+    if n_chunks == 0:
+        return np.empty(0, dtype=np.float64)
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return _cal_ts(conc, fcs, ags, pvs, ws, workers, executor)
+    chunks = [np.array_split(a, n_chunks) for a in (fcs, ags, pvs, ws)]
+    rets = executor.map(_cal_ts_chunk, [conc_data] * n_chunks, *chunks)
+    return np.concatenate(list(rets))
+
+
+# samplers of _sampleMonteCarlo
+SAMPLERS = ("legacy", "pcg64", "lhs", "sobol")
+
+
+def _iterSamples(
+    seed_code=1,
+    ntimes: int = 5,
+    nsets: int = 400,
+    sampler: str = "legacy",
+    chunk_size: int = None,
+):
+    """
+    yield blocks of at most chunk_size uniform samples in [0,1), as arrays of shape (k, 4) for (fc, w, ag, pv).
+    The blocks put together are the same for any chunk_size, except for "lhs" where every block is
+    a Latin hypercube of its own (see _sampleMonteCarlo for the samplers)
+    """
+    n = ntimes * nsets
+    chunk_size = max(n, 1) if chunk_size is None else chunk_size
+    if sampler == "legacy":
+        for time in range(ntimes):
+            seed = (time + 1) * seed_code
+            rnds = [random.Random((k + 1) * seed) for k in range(4)]
+            for s in range(0, nsets, chunk_size):
+                m = min(chunk_size, nsets - s)
+                u = np.empty((4, m), dtype=np.float64)
+                for k in range(4):
+                    u[k] = [rnds[k].random() for i in range(m)]
+                yield u.T
+        return
+
+    if sampler == "pcg64":
+        draw = np.random.Generator(np.random.PCG64(seed_code)).random
+    elif sampler == "lhs":
+        draw = qmc.LatinHypercube(d=4, rng=np.random.default_rng(seed_code)).random
+    elif sampler == "sobol":
+        draw = qmc.Sobol(d=4, scramble=True, rng=np.random.default_rng(seed_code))
+        draw = draw.random
+    else:
+        raise ValueError(f"sampler must be in {SAMPLERS}: {sampler}")
+    for s in range(0, n, chunk_size):
+        m = min(chunk_size, n - s)
+        with warnings.catch_warnings():
+            # the balance warning of Sobol for sizes that are not powers of 2
+            warnings.simplefilter("ignore", UserWarning)
+            yield draw((m, 4)) if sampler == "pcg64" else draw(m)
+
+
+def _rechunk(blocks, chunk_size: int):
+    """
+    regroup blocks of rows into chunks of exactly chunk_size rows (the last one can be smaller)
+    """
+    buf, size = [], 0
+    for b in blocks:
+        buf.append(b)
+        size += len(b)
+        while size >= chunk_size:
+            a = np.concatenate(buf)
+            yield a[:chunk_size]
+            buf, size = [a[chunk_size:]], size - chunk_size
+    if size > 0:
+        yield np.concatenate(buf)
+
+
+def _scaleSamples(u: np.ndarray, fcr: tuple, wr: tuple, agr: tuple, pvr: tuple):
+    """
+    scale uniform samples (k, 4) of (fc, w, ag, pv) into their ranges (min,max)
+
+    return arrays (fcs, ws, ags, pvs)
+    """
+    return tuple(
+        np.ascontiguousarray(u[:, k]) * (r[1] - r[0]) + r[0]
+        for k, r in enumerate((fcr, wr, agr, pvr))
+    )
+
+
+def _sampleMonteCarlo(
+    seed_code=1,
+    ntimes: int = 5,
+    nsets: int = 400,
+    fcr: tuple = (20, 180),
+    wr: tuple = (0.01, 1.6),
+    agr: tuple = (16, 32),
+    pvr: tuple = (0.1, 1),
+    sampler: str = "legacy",
+):
+    """
+    draw ntimes * nsets samples of (fc, w, ag, pv), uniformly in the ranges (min,max), with
+    - "legacy": the stdlib random sequences of the earlier versions, seeded by 1*n, 2*n, 3*n, 4*n for
+      fc, w, ag, pv with n = (time + 1) * seed_code, nsets samples for each time. Kept to reproduce old results
+    - "pcg64": numpy.random.Generator(PCG64(seed_code)), all samples drawn at once as rows of (fc, w, ag, pv)
+    - "lhs": scipy.stats.qmc.LatinHypercube, seeded by seed_code
+    - "sobol": scrambled scipy.stats.qmc.Sobol, seeded by seed_code (balanced if ntimes * nsets is a power of 2)
+
+    return arrays (fcs, ws, ags, pvs)
+    """
+    blocks = list(_iterSamples(seed_code, ntimes, nsets, sampler))
+    u = np.concatenate(blocks) if blocks else np.empty((0, 4), dtype=np.float64)
+    return _scaleSamples(u, fcr, wr, agr, pvr)
+
+
+def _iterMonteCarlo(
+    conc: Conc_AI,
+    seed_code=1,
+    ntimes: int = 5,
+    nsets: int = 400,
+    fcr: tuple = (20, 180),
+    wr: tuple = (0.01, 1.6),
+    agr: tuple = (16, 32),
+    pvr: tuple = (0.1, 1),
+    table: AI_MaxTable = None,
+    workers: int = None,
+    sampler: str = "legacy",
+    chunk_size: int = 100000,
+):
+    """
+    same dataset as _genMonteCarlo, yielded in chunks of chunk_size rows as (X, y):
+    X is a C-contiguous float64 array of shape (4, k) with rows (fcs, ags, pvs, ws), y = ts of shape (k,).
+    Only one chunk is held at a time
+    """
+    _checkTable(conc, table)
+    blocks = _rechunk(
+        _iterSamples(seed_code, ntimes, nsets, sampler, chunk_size), chunk_size
+    )
+    executor = None
+    if table is None and workers is not None and workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for u in blocks:
+            fcs, ws, ags, pvs = _scaleSamples(u, fcr, wr, agr, pvr)
+            if table is None:
+                ts = _cal_ts(conc, fcs, ags, pvs, ws, workers, executor)
+            else:
+                ts = table.calMaxStresses_all(w=ws, fc=fcs, ag=ags, pv=pvs)[7]
+            yield np.stack((fcs, ags, pvs, ws)), np.asarray(ts, dtype=np.float64)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _checkTable(conc: Conc_AI, table: AI_MaxTable):
+    """raise ValueError if table was built for a concrete other than conc, fc, ag and pv aside (sampled)"""
+    if table is not None:
+        table.check_conc(conc, varying=("fc", "ag", "pv"))
+
+
+def _keyMonteCarlo(
+    conc: Conc_AI,
+    seed_code,
+    ntimes: int,
+    nsets: int,
+    fcr: tuple,
+    wr: tuple,
+    agr: tuple,
+    pvr: tuple,
+    table: AI_MaxTable,
+    sampler: str,
+    chunk_size: int,
+) -> str:
+    """
+    cache key of a Monte Carlo dataset. workers is left out as it does not change the dataset,
+    chunk_size is only kept for "lhs" whose samples depend on it. The digest of the modules
+    generating the dataset keeps the entries of older code from being reused
+    """
+    return dataset_cache.dataset_key(
+        source=dataset_cache.source_digest(
+            model.r_ai_n, model.r_ai_table, sys.modules[__name__]
+        ),
+        conc=conc.data2dict(),
+        seed_code=seed_code,
+        ntimes=ntimes,
+        nsets=nsets,
+        ranges=[fcr, wr, agr, pvr],
+        sampler=sampler,
+        chunk_size=chunk_size if sampler == "lhs" else None,
+        table=(
+            None
+            if table is None
+            else [
+                table.conc,
+                table.method,
+                dataset_cache.array_digest(table.values, *table.axes.values()),
+                list(table.axes),
+            ]
+        ),
+    )
+
+
 def _genMonteCarlo(
     conc: Conc_AI,
     seed_code=1,
@@ -23,84 +255,273 @@ def _genMonteCarlo(
     wr: tuple = (0.01, 1.6),
     agr: tuple = (16, 32),
     pvr: tuple = (0.1, 1),
+    table: AI_MaxTable = None,
+    workers: int = None,
+    sampler: str = "legacy",
+    cache: bool = False,
 ):
     """
     randomize survey/train data n_times times, and nsets for each time
     >> tuple for a variable (min,max)
+    >> sampler: see _sampleMonteCarlo
+    >> table: if given, ts is interpolated from the table instead of calculated by conc
+    >> workers: number of processes to calculate ts, the results are the same as with one process
+    >> cache: reuse the dataset of the same parameters from the disk cache (model.r_dataset_cache), opt-in
+       as it writes to dataset_cache.CACHE_DIR (BCD_CACHE_DIR), up to CACHE_MAX_MB (BCD_CACHE_MAX_MB)
 
-    return a dataframe of (fcs,ws,ags,pvs)
-    """
-
-    def cal_ts(row):
-        conc.fc = row["fc"]
-        conc.ag = row["ag"]
-        conc.pv = row["pv"]
-        (
-            ns_ai,
-            ts_ai,
-            ns_ai_c,
-            ts_ai_c,
-            ns_ai_f,
-            ts_ai_f,
-            ns,
-            ts,
-            ns_fr,
-            ts_fr,
-            delta,
-        ) = conc.calMaxStresses_all(w=row["w"])
-        return ts
-
-    dataset = []
-    fcs, ws, ags, pvs = [], [], [], []
-
-    fc0 = fcr[0]
-    stepfc = fcr[1] - fcr[0]
-
-    w0 = wr[0]
-    stepw = wr[1] - wr[0]
-
-    ag0 = agr[0]
-    stepag = agr[1] - agr[0]
-
-    pv0 = pvr[0]
-    steppv = pvr[1] - pvr[0]
-
-    for time in range(ntimes):
-        n = (time + 1) * seed_code
-        # fc
-        random.seed(1 * n)
-        for i in range(nsets):
-            fc = random.random() * stepfc + fc0
-            fcs.append(fc)
-        # w
-        random.seed(2 * n)
-        for i in range(nsets):
-            w = random.random() * stepw + w0
-            ws.append(w)
-        # ag
-        random.seed(3 * n)
-        for i in range(nsets):
-            ag = random.random() * stepag + ag0
-            ags.append(ag)
-        # pv
-        random.seed(4 * n)
-        for i in range(nsets):
-            pv = random.random() * steppv + pv0
-            pvs.append(pv)
-
-    dataset = list(zip(fcs, ws, ags, pvs))
-    df = pd.DataFrame(dataset, columns=["fc", "w", "ag", "pv"])
-    df["ts"] = df.apply(cal_ts, axis=1)
-    # df.to_excel("MC.xlsx")
-    return (
-        (
-            df["fc"].to_numpy(dtype=np.float64),
-            df["ag"].to_numpy(dtype=np.float64),
-            df["pv"].to_numpy(dtype=np.float64),
-            df["w"].to_numpy(dtype=np.float64),
-        ),
-        df["ts"].to_numpy(),
+    return ((fcs, ags, pvs, ws), ts) as float64 arrays
+    """
+    n = ntimes * nsets
+    _checkTable(conc, table)
+    if cache:
+        key = _keyMonteCarlo(
+            conc, seed_code, ntimes, nsets, fcr, wr, agr, pvr, table, sampler, max(n, 1)
+        )
+        hit = dataset_cache.load(key)
+        if hit is not None:
+            X, y = hit
+            return (X[0], X[1], X[2], X[3]), y
+
+    X = np.empty((4, n), dtype=np.float64)
+    y = np.empty(n, dtype=np.float64)
+    chunks = _iterMonteCarlo(
+        conc,
+        seed_code=seed_code,
+        ntimes=ntimes,
+        nsets=nsets,
+        fcr=fcr,
+        wr=wr,
+        agr=agr,
+        pvr=pvr,
+        table=table,
+        workers=workers,
+        sampler=sampler,
+        chunk_size=max(n, 1),
     )
+    s = 0
+    for Xc, yc in chunks:
+        X[:, s : s + len(yc)] = Xc
+        y[s : s + len(yc)] = yc
+        s += len(yc)
+    if cache:
+        try:
+            dataset_cache.store(key, X, y)
+        except OSError as e:
+            warnings.warn(f"Monte Carlo dataset not cached: {e}")
+    return (X[0], X[1], X[2], X[3]), y
+
+
+def _spillMonteCarlo(chunks, n: int, folder: str):
+    """
+    write the chunks of _iterMonteCarlo to .npy files in folder
+
+    return memory-mapped (X, y) of shapes (4, n) and (n,)
+    """
+    X = np.lib.format.open_memmap(
+        os.path.join(folder, "X.npy"), mode="w+", dtype=np.float64, shape=(4, n)
+    )
+    y = np.lib.format.open_memmap(
+        os.path.join(folder, "y.npy"), mode="w+", dtype=np.float64, shape=(n,)
+    )
+    s = 0
+    for Xc, yc in chunks:
+        X[:, s : s + len(yc)] = Xc
+        y[s : s + len(yc)] = yc
+        s += len(yc)
+    X.flush()
+    y.flush()
+    return X, y
+
+
+def _openMonteCarlo(
+    conc: Conc_AI,
+    seed_code=1,
+    ntimes: int = 5,
+    nsets: int = 400,
+    fcr: tuple = (20, 180),
+    wr: tuple = (0.01, 1.6),
+    agr: tuple = (16, 32),
+    pvr: tuple = (0.1, 1),
+    table: AI_MaxTable = None,
+    workers: int = None,
+    sampler: str = "legacy",
+    chunk_size: int = 100000,
+    cache: bool = False,
+    folder: str = None,
+):
+    """
+    the dataset of _iterMonteCarlo as memory-mapped (X, y) of shapes (4, n) and (n,).
+    It is generated chunk by chunk into the disk cache, or into folder if cache is False (or not writable)
+    """
+    n = ntimes * nsets
+    _checkTable(conc, table)
+
+    def chunks():
+        return _iterMonteCarlo(
+            conc,
+            seed_code=seed_code,
+            ntimes=ntimes,
+            nsets=nsets,
+            fcr=fcr,
+            wr=wr,
+            agr=agr,
+            pvr=pvr,
+            table=table,
+            workers=workers,
+            sampler=sampler,
+            chunk_size=chunk_size,
+        )
+
+    if cache:
+        key = _keyMonteCarlo(
+            conc,
+            seed_code,
+            ntimes,
+            nsets,
+            fcr,
+            wr,
+            agr,
+            pvr,
+            table,
+            sampler,
+            chunk_size,
+        )
+        hit = dataset_cache.load(key, mmap_mode="r")
+        if hit is not None:
+            return hit
+        try:
+            path = dataset_cache.new_entry()
+        except OSError as e:
+            warnings.warn(f"Monte Carlo dataset not cached: {e}")
+        else:
+            X, y = _spillMonteCarlo(chunks(), n, path)
+            del X, y
+            dataset_cache.commit(key, path)
+            return dataset_cache.load(key, mmap_mode="r")
+    return _spillMonteCarlo(chunks(), n, folder)
+
+
+def _iterChunks(X, y, chunk_size: int):
+    """yield (X, y) in chunks of chunk_size columns, loaded in memory"""
+    for s in range(0, len(y), chunk_size):
+        yield np.array(X[:, s : s + chunk_size]), np.array(y[s : s + chunk_size])
+
+
+class _MetricsStream:
+    """
+    MAPE, SMAPE and R2 (as in _metrics_results) accumulated chunk by chunk
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.s_ape = 0.0
+        self.s_sape = 0.0
+        self.ss_res = 0.0
+        self.mean = 0.0
+        self.ss_tot = 0.0
+
+    def update(self, y, yhat):
+        k = len(y)
+        if k == 0:
+            return
+        eps = np.finfo(np.float64).eps
+        self.s_ape += np.sum(np.abs(y - yhat) / np.maximum(np.abs(y), eps))
+        self.s_sape += np.sum(2 * np.abs((y - yhat) / (y + yhat)))
+        self.ss_res += np.sum((y - yhat) ** 2)
+        # combine the sums of squares about the mean (Chan et al.)
+        mean_k = np.mean(y)
+        ss_k = np.sum((y - mean_k) ** 2)
+        d = mean_k - self.mean
+        n = self.n + k
+        self.ss_tot += ss_k + d * d * self.n * k / n
+        self.mean += d * k / n
+        self.n = n
+
+    def results(self):
+        mape = self.s_ape / self.n
+        smape = self.s_sape / self.n
+        if self.ss_tot > 0:
+            r2 = 1 - self.ss_res / self.ss_tot
+        else:
+            r2 = 1.0 if self.ss_res == 0 else 0.0
+        return mape, smape, r2
+
+
+def _metrics_stream(func, p, X, y, chunk_size: int):
+    """_metrics_results of y and func(X, *p), computed chunk by chunk (p: a parameter or a sequence of them)"""
+    m = _MetricsStream()
+    for Xc, yc in _iterChunks(X, y, chunk_size):
+        m.update(yc, func(Xc, *np.atleast_1d(p)))
+    return m.results()
+
+
+def _curve_fit_stream(
+    func,
+    X,
+    y,
+    chunk_size: int,
+    p0: tuple = (1.0,),
+    jac=None,
+    max_iter: int = 100,
+    xtol=1e-10,
+):
+    """
+    least-squares fit of the parameters p of y = func(X, *p) with Gauss-Newton steps,
+    each made of one pass over the chunks of (X, y). The Jacobian jac(X, *p) of shape (k, len(p))
+    is taken by central differences if not given, and a step is halved while it increases
+    the sum of squared residuals
+
+    return popt, pcov (as curve_fit with absolute_sigma=False)
+    """
+    p0 = np.asarray(p0, dtype=np.float64)
+
+    def jac_fd(Xc, *p):
+        j = np.empty((Xc.shape[1], len(p)), dtype=np.float64)
+        for k in range(len(p)):
+            h = 1e-7 * max(1.0, abs(p[k]))
+            dp = np.zeros(len(p))
+            dp[k] = h
+            j[:, k] = (func(Xc, *(p + dp)) - func(Xc, *(p - dp))) / (2 * h)
+        return j
+
+    jac = jac_fd if jac is None else jac
+
+    def one_pass(p: np.ndarray):
+        sse, jtj, jtr = 0.0, np.zeros((len(p), len(p))), np.zeros(len(p))
+        for Xc, yc in _iterChunks(X, y, chunk_size):
+            r = yc - func(Xc, *p)
+            j = jac(Xc, *p)
+            sse += r @ r
+            jtj += j.T @ j
+            jtr += j.T @ r
+        return sse, jtj, jtr
+
+    def small(step, p):
+        return np.all(np.abs(step) < xtol * (1 + np.abs(p)))
+
+    p = p0
+    sse, jtj, jtr = one_pass(p)
+    for i in range(max_iter):
+        try:
+            step = np.linalg.solve(jtj, jtr)
+        except np.linalg.LinAlgError:
+            break
+        while True:
+            n_sse, n_jtj, n_jtr = one_pass(p + step)
+            if n_sse <= sse or small(step, p):
+                break
+            step = step / 2
+        p = p + step
+        sse, jtj, jtr = n_sse, n_jtj, n_jtr
+        if small(step, p):
+            break
+
+    n = len(y)
+    try:
+        pcov = np.linalg.inv(jtj) * (sse / (n - len(p)) if n > len(p) else np.inf)
+    except np.linalg.LinAlgError:
+        pcov = np.full((len(p), len(p)), np.inf)
+    return p, pcov
 
 
 def _orient_funcC(X, C: float):
@@ -115,6 +536,18 @@ def _orient_funcC(X, C: float):
         return y
 
 
+def _jac_funcC(X, C: float):
+    """d _orient_funcC / dC, shape (k, 1)"""
+    fcs, ags, pvs, ws = X
+    if C > 0:
+        numerator = np.sqrt(fcs) * (1 - 2 * ws / ags)
+        denominator = 0.31 * (1 + C * (1 - pvs))
+        dy = -numerator * 0.31 * (1 - pvs) / denominator**2
+        return dy[:, None]
+    else:
+        return np.zeros((len(ws), 1))
+
+
 def orient_funcA(C: float):
     def wrapperA(X, A: float):
         fcs, ags, pvs, ws = X
@@ -131,6 +564,38 @@ def orient_funcA(C: float):
     return wrapperA
 
 
+def _jac_funcAC(X, A: float, C: float, b_C: bool = True):
+    """d orient_funcA(C)(X, A) / d(A, C), shape (k, 2), or (k, 1) for A only if not b_C"""
+    fcs, ags, pvs, ws = X
+    jac = np.zeros((len(ws), 2 if b_C else 1))
+    B = 16 - A
+    if B > 0:
+        numerator = np.sqrt(fcs) * (1 - 2 * ws / ags)
+        c = 0.31 * (1 - pvs)
+        e = pvs * (ags + A) + B
+        t = 24 * ws / e
+        # dy/d(denominator) = -y / denominator
+        dy_dd = numerator / (0.31 + C * c + t) ** 2
+        jac[:, 0] = dy_dd * t * (pvs - 1) / e
+        if b_C:
+            jac[:, 1] = -dy_dd * c
+    return jac
+
+
+def jac_funcA(C: float):
+    """d orient_funcA(C) / dA, shape (k, 1)"""
+
+    def wrapperA(X, A: float):
+        return _jac_funcAC(X, A, C, b_C=False)
+
+    return wrapperA
+
+
+def _orient_funcAC(X, A: float, C: float):
+    """orient_funcA(C)(X, A) with both A and C as parameters"""
+    return orient_funcA(C)(X, A)
+
+
 def fit2C(
     conc: Conc_AI,
     fcr: tuple = (20, 180),
@@ -140,7 +605,47 @@ def fit2C(
     ntimes: int = 5,
     nsets: int = 400,
     seed_code=1,
+    table: AI_MaxTable = None,
+    workers: int = None,
+    sampler: str = "legacy",
+    chunk_size: int = None,
+    cache: bool = False,
+    b_pcov: bool = False,
 ):
+    """
+    >> chunk_size: if given, the dataset is generated chunk by chunk and spilled to the disk cache
+       (a temporary file if cache is False), C is fitted and the metrics accumulated over the chunks,
+       so memory does not grow with ntimes * nsets
+    >> b_pcov: also return the covariance pcov of the fitted parameter
+    """
+    if chunk_size is not None:
+        with tempfile.TemporaryDirectory() as folder:
+            X_trainC, y_trainC = _openMonteCarlo(
+                conc,
+                seed_code=seed_code,
+                fcr=fcr,
+                wr=wr,
+                agr=agr,
+                pvr=pvr,
+                ntimes=ntimes,
+                nsets=nsets,
+                table=table,
+                workers=workers,
+                sampler=sampler,
+                chunk_size=chunk_size,
+                cache=cache,
+                folder=folder,
+            )
+            popt, pcov = _curve_fit_stream(
+                _orient_funcC, X_trainC, y_trainC, chunk_size, jac=_jac_funcC
+            )
+            C = popt[0]
+            mape, smape, r2 = _metrics_stream(
+                _orient_funcC, C, X_trainC, y_trainC, chunk_size
+            )
+            del X_trainC, y_trainC
+        return (C, mape, smape, r2, pcov) if b_pcov else (C, mape, smape, r2)
+
     X_trainC, y_trainC = _genMonteCarlo(
         conc,
         seed_code=seed_code,
@@ -150,14 +655,18 @@ def fit2C(
         pvr=pvr,
         ntimes=ntimes,
         nsets=nsets,
+        table=table,
+        workers=workers,
+        sampler=sampler,
+        cache=cache,
     )
 
-    popt, pcov = curve_fit(_orient_funcC, X_trainC, y_trainC)
+    popt, pcov = curve_fit(_orient_funcC, X_trainC, y_trainC, jac=_jac_funcC)
     C = popt[0]
     yhat_trainC = _orient_funcC(X_trainC, C)
     mape, smape, r2 = _metrics_results(y_trainC, yhat_trainC)
 
-    return C, mape, smape, r2
+    return (C, mape, smape, r2, pcov) if b_pcov else (C, mape, smape, r2)
 
 
 def fit2A(
@@ -170,13 +679,65 @@ def fit2A(
     nsets: int = 400,
     seed_code=10,
     C=0.5,
+    table: AI_MaxTable = None,
+    workers: int = None,
+    sampler: str = "legacy",
+    chunk_size: int = None,
+    cache: bool = False,
+    b_pcov: bool = False,
 ):
+    """
+    >> chunk_size, b_pcov: see fit2C
+    """
+    ort_funcA = orient_funcA(C)
+    if chunk_size is not None:
+        with tempfile.TemporaryDirectory() as folder:
+            X_trainA, y_trainA = _openMonteCarlo(
+                conc,
+                seed_code=seed_code,
+                ntimes=ntimes,
+                nsets=nsets,
+                fcr=fcr,
+                wr=wr,
+                agr=agr,
+                pvr=pvr,
+                table=table,
+                workers=workers,
+                sampler=sampler,
+                chunk_size=chunk_size,
+                cache=cache,
+                folder=folder,
+            )
+            popt, pcov = _curve_fit_stream(
+                ort_funcA, X_trainA, y_trainA, chunk_size, jac=jac_funcA(C)
+            )
+            A0 = popt[0]
+            mape0, smape0, r2_0 = _metrics_stream(
+                ort_funcA, A0, X_trainA, y_trainA, chunk_size
+            )
+            mape8, smape8, r2_8 = _metrics_stream(
+                ort_funcA, 8, X_trainA, y_trainA, chunk_size
+            )
+            del X_trainA, y_trainA
+        rets = A0, mape0, smape0, r2_0, mape8, smape8, r2_8
+        return rets + (pcov,) if b_pcov else rets
+
     X_trainA, y_trainA = _genMonteCarlo(
-        conc, seed_code=seed_code, fcr=fcr, wr=wr, agr=agr, pvr=pvr
+        conc,
+        seed_code=seed_code,
+        ntimes=ntimes,
+        nsets=nsets,
+        fcr=fcr,
+        wr=wr,
+        agr=agr,
+        pvr=pvr,
+        table=table,
+        workers=workers,
+        sampler=sampler,
+        cache=cache,
     )
 
-    ort_funcA = orient_funcA(C)
-    popt, pcov = curve_fit(ort_funcA, X_trainA, y_trainA)
+    popt, pcov = curve_fit(ort_funcA, X_trainA, y_trainA, jac=jac_funcA(C))
     A0 = popt[0]
 
     yhat_trainA = ort_funcA(X_trainA, A0)
@@ -187,7 +748,67 @@ def fit2A(
     yhat_trainA = ort_funcA(X_trainA, A)
     mape8, smape8, r2_8 = _metrics_results(y_trainA, yhat_trainA)
 
-    return A0, mape0, smape0, r2_0, mape8, smape8, r2_8
+    rets = A0, mape0, smape0, r2_0, mape8, smape8, r2_8
+    return rets + (pcov,) if b_pcov else rets
+
+
+def fit2AC(
+    conc: Conc_AI,
+    fcr: tuple = (20, 180),
+    wr: tuple = (0.01, 1.6),
+    agr: tuple = (16, 32),
+    pvr: tuple = (0.1, 1),
+    ntimes: int = 5,
+    nsets: int = 400,
+    seed_code=10,
+    p0: tuple = (8, 0.5),
+    table: AI_MaxTable = None,
+    workers: int = None,
+    sampler: str = "legacy",
+    chunk_size: int = None,
+    cache: bool = False,
+):
+    """
+    fit A and C of orient_funcA jointly, starting from p0 = (A, C)
+    >> chunk_size: see fit2C
+
+    return A, C, mape, smape, r2, pcov (2x2 for A, C)
+    """
+    gen = dict(
+        seed_code=seed_code,
+        fcr=fcr,
+        wr=wr,
+        agr=agr,
+        pvr=pvr,
+        ntimes=ntimes,
+        nsets=nsets,
+        table=table,
+        workers=workers,
+        sampler=sampler,
+        cache=cache,
+    )
+    if chunk_size is not None:
+        with tempfile.TemporaryDirectory() as folder:
+            X_train, y_train = _openMonteCarlo(
+                conc, chunk_size=chunk_size, folder=folder, **gen
+            )
+            popt, pcov = _curve_fit_stream(
+                _orient_funcAC, X_train, y_train, chunk_size, p0=p0, jac=_jac_funcAC
+            )
+            A, C = popt
+            mape, smape, r2 = _metrics_stream(
+                _orient_funcAC, popt, X_train, y_train, chunk_size
+            )
+            del X_train, y_train
+        return A, C, mape, smape, r2, pcov
+
+    X_train, y_train = _genMonteCarlo(conc, **gen)
+    popt, pcov = curve_fit(_orient_funcAC, X_train, y_train, p0=p0, jac=_jac_funcAC)
+    A, C = popt
+    yhat_train = _orient_funcAC(X_train, A, C)
+    mape, smape, r2 = _metrics_results(y_train, yhat_train)
+
+    return A, C, mape, smape, r2, pcov
 
 
 def test_MonteCarlo(
@@ -201,6 +822,10 @@ def test_MonteCarlo(
     seed_code=1000,
     C=0.5,
     A=8,
+    table: AI_MaxTable = None,
+    workers: int = None,
+    sampler: str = "legacy",
+    cache: bool = False,
 ):
     # TESTING DATA
     ort_funcA = orient_funcA(C=C)
@@ -213,6 +838,10 @@ def test_MonteCarlo(
         wr=wr,
         agr=agr,
         pvr=pvr,
+        table=table,
+        workers=workers,
+        sampler=sampler,
+        cache=cache,
     )
     yhat_test1 = ort_funcA(X_test, A)
     mape, smape, r2 = _metrics_results(y_test, yhat_test1)
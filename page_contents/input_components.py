@@ -272,6 +272,27 @@ def ags_input(key="ags_in"):
     return ags
 
 
+# labels of the engines of the sweeps (model.r_ai_sweep.SWEEP_ENGINES)
+SWEEP_ENGINE_LABELS = {
+    "exact": "exact (scipy quad, reference)",
+    "batch": "fast (Gauss-Legendre, approximate)",
+}
+
+
+def sweep_engine_input(default="exact", key="sweep_engine_in"):
+    """engine of a sweep, the exact one by default"""
+    engines = list(SWEEP_ENGINE_LABELS)
+    return st.radio(
+        "Engine",
+        engines,
+        index=engines.index(default),
+        format_func=SWEEP_ENGINE_LABELS.get,
+        horizontal=True,
+        help="the fast engine differs from the exact one by about 1e-5 MPa",
+        key=key,
+    )
+
+
 def sidebar_m_mcft_params(
     key="sidebar_mmcft_params",
 ):
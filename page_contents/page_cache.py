@@ -0,0 +1,21 @@
+import os
+import streamlit as st
+
+# limits of the results cached by the pages, shared by all the sessions of the app:
+# seconds to keep an entry, and max number of entries of each cached function
+CACHE_TTL = float(os.environ.get("BCD_ST_CACHE_TTL", 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get("BCD_ST_CACHE_MAX_ENTRIES", 32))
+
+
+def cache_data(func=None, **kwargs):
+    """
+    st.cache_data with ttl=CACHE_TTL and max_entries=CACHE_MAX_ENTRIES by default.
+    The cached functions take Conc_AI.data2dict() instead of a Conc_AI, so that the key is its parameters
+    """
+    kwargs = {
+        "ttl": CACHE_TTL,
+        "max_entries": CACHE_MAX_ENTRIES,
+        "show_spinner": False,
+        **kwargs,
+    }
+    return st.cache_data(func, **kwargs)
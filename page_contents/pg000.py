@@ -4,12 +4,55 @@ from page_contents.input_components import (
     conc_input,
     pvs_input,
     ws_deltas_input,
+    sweep_engine_input,
+    SWEEP_ENGINE_LABELS,
 )
 from model.r_ai_n import *
 from model.r_ai_mcft import *
 import pandas as pd
 import matplotlib.pyplot as plt
 from supp_funcs import colorBetween, randColor, randMarker
+from model.r_ai_sweep import *
+from page_contents.page_cache import cache_data
+
+# default engine of the sweeps of pg000_f01 .. pg000_f03, see SWEEP_ENGINES
+SWEEP_ENGINE = "exact"
+
+
+@cache_data
+def pg000_f00_cal(conc_d: dict, ws: np.ndarray, deltas: np.ndarray) -> pd.DataFrame:
+    """stresses of pg000_f00 for the concrete conc_d (Conc_AI.data2dict())"""
+    return AI_Calculate.calStress_w_delta(conc=Conc_AI(**conc_d), ws=ws, deltas=deltas)
+
+
+@cache_data
+def pg000_f01_cal(
+    conc_d: dict, pvs: np.ndarray, ws: np.ndarray, deltas: np.ndarray, engine: str
+) -> pd.DataFrame:
+    """stresses of pg000_f01 over pvs x ws x deltas, see sweep_stresses_pv"""
+    return sweep_stresses_pv(Conc_AI(**conc_d), pvs, ws, deltas, engine=engine)
+
+
+@cache_data
+def pg000_f02_cal(
+    conc_d: dict, ags: np.ndarray, ws: np.ndarray, engine: str
+) -> pd.DataFrame:
+    """max stresses of pg000_f02 over ags x ws, see sweep_max_ag"""
+    return sweep_max_ag(Conc_AI(**conc_d), ags, ws, engine=engine)
+
+
+@cache_data
+def pg000_f03_cal(
+    conc_d: dict, ags: np.ndarray, pvs: np.ndarray, ws: np.ndarray, engine: str
+) -> pd.DataFrame:
+    """max shear stresses of pg000_f03 over ags x pvs x ws, see sweep_max_ag_pv"""
+    return sweep_max_ag_pv(Conc_AI(**conc_d), ags, pvs, ws, engine=engine)
+
+
+def engine_note(engine: str):
+    """label the results of an approximate engine"""
+    if engine != "exact":
+        st.info(f"Approximate results: {SWEEP_ENGINE_LABELS[engine]} engine")
 
 
 def pg000_f00(conc: Conc_AI):
@@ -27,9 +70,7 @@ def pg000_f00(conc: Conc_AI):
 
     if bt000_00:
         with st.status("Running", expanded=True):
-            df: pd.DataFrame = AI_Calculate.calStress_w_delta(
-                conc=conc, ws=ws, deltas=deltas
-            )
+            df: pd.DataFrame = pg000_f00_cal(conc.data2dict(), ws, deltas)
             st.success(f"  For w in {np.round(ws,2).tolist()}")
 
         st.divider()
@@ -142,6 +183,7 @@ def pg000_f01(conc: Conc_AI):
             conc, b_pv=False, b_pvf=False, key="conc_in_pg000_f01"
         )
         pvs = pvs_input(key="pvs_in_pg000_f01")
+        engine = sweep_engine_input(SWEEP_ENGINE, key="engine_in_pg000_f01")
 
     c1, c2, c3, c4, c5 = st.columns(5)
     with c5:
@@ -185,31 +227,11 @@ def pg000_f01(conc: Conc_AI):
 
             l_pv = pvs.tolist()
 
+            df_all = pg000_f01_cal(conc.data2dict(), pvs, ws, deltas, engine)
+            engine_note(engine)
             for index, p_v in enumerate(l_pv):
                 conc.pv = p_v
-                df = pd.DataFrame(columns=["w", "delta", "ns", "ts"])
-                # run every case in (ws, deltas)
-                i = 0
-                for w in ws:
-                    for delta in deltas:
-                        (
-                            ns_ai,
-                            ts_ai,
-                            ns_ai_c,
-                            ts_ai_c,
-                            ns_ai_f,
-                            ts_ai_f,
-                            ns,
-                            ts,
-                            ns_fr,
-                            ts_fr,
-                        ) = conc.calStresses_all(w=w, delta=delta)
-                        df.loc[i, "w"] = w
-                        df.loc[i, "delta"] = delta
-                        df.loc[i, "ns"] = ns
-                        df.loc[i, "ts"] = ts
-                        i += 1
-
+                df = df_all.loc[df_all["pv"] == p_v]
                 # visualize the results
                 alpha1 = 1
                 alpha2 = 0.45  # 0.5 - p_v * 0.25
@@ -288,6 +310,7 @@ def pg000_f02(conc: Conc_AI):
     with st.expander("Input information"):
         conc, conc_name = conc_input(conc, b_ag=False, key="conc_in_pg000_f02")
         ags = ags_input(key="ags_in_pg000_f02")
+        engine = sweep_engine_input(SWEEP_ENGINE, key="engine_in_pg000_f02")
 
     c1, c2, c3, c4, c5 = st.columns(5)
     with c5:
@@ -306,41 +329,11 @@ def pg000_f02(conc: Conc_AI):
             fig = plt.figure()
             a1 = fig.add_subplot(111)
             # calculate and visualize data for concretes
-            concW = deepcopy(conc)
-            concW.pv = 1
+            df_all = pg000_f02_cal(conc.data2dict(), ags, ws, engine)
+            engine_note(engine)
             for index, ag in enumerate(ags):
                 conc.ag = ag
-                concW.ag = ag
-                df = pd.DataFrame(
-                    columns=["w", "delta_m", "tsW", "ts_ai_c", "ts_ai_f", "ts_fr", "ts"]
-                )
-                i = 0
-                for w in ws:
-                    df.loc[i, "w"] = w
-                    # Walraven with pv=1
-                    _, tsW, _, _, _, _, _ = concW.calMaxStresses_ai(w=w)
-                    df.loc[i, "tsW"] = tsW
-                    # BCD
-                    (
-                        ns_ai,
-                        ts_ai,
-                        ns_ai_c,
-                        ts_ai_c,
-                        ns_ai_f,
-                        ts_ai_f,
-                        ns,
-                        ts,
-                        ns_fr,
-                        ts_fr,
-                        delta,
-                    ) = conc.calMaxStresses_all(w)
-                    df.loc[i, "ts_fr"] = ts_fr
-                    df.loc[i, "ts_ai_c"] = ts_ai_c
-                    df.loc[i, "ts_ai_f"] = ts_ai_f
-                    df.loc[i, "ts"] = ts
-                    df.loc[i, "delta_m"] = delta
-                    i += 1
-
+                df = df_all.loc[df_all["ag"] == ag]
                 # Walraven with pv = 1
                 color = randColor(index)
 
@@ -419,6 +412,7 @@ def pg000_f03(conc: Conc_AI):
         )
         ags = ags_input(key="ags_in_pg000_f03")
         pvs = pvs_input(key="pvs_in_pg000_f03")
+        engine = sweep_engine_input(SWEEP_ENGINE, key="engine_in_pg000_f03")
 
         with st.container(border=True, key="ag_pv_in_pg000_03"):
             c1, c2 = st.columns(2)
@@ -455,68 +449,8 @@ def pg000_f03(conc: Conc_AI):
             ws = np.linspace(0.01, 1.6, 100, endpoint=True)  # 0.01 to 4: 200 points
 
             # data processing
-            concW = deepcopy(conc)  # for Walraven 1990
-            concW.pv = 1
-            concW0 = deepcopy(concW)  # for Walraven 1981
-            concW0.sig_puCalType = 0
-
-            # calculate data for concretes
-            df = pd.DataFrame(
-                columns=[
-                    "ag",
-                    "pv",
-                    "w",
-                    "ts_ai_c",
-                    "ts_ai_f",
-                    "ts_ai",
-                    "ts",
-                    "ts_fr",
-                    "tsW",
-                    "tsW0",
-                    "ts_mcft",
-                ]
-            )
-            i = 0
-            for ag in ags:
-                conc.ag = ag
-                concW.ag = ag
-                concW0.ag = ag
-                for p_v in pvs:
-                    conc.pv = p_v
-                    for w in ws:
-                        df.loc[i, "ag"] = ag
-                        df.loc[i, "pv"] = p_v
-                        df.loc[i, "w"] = w
-                        # Walraven - or with pv=1
-                        #   1990
-                        _, tsW, _, _, _, _, _ = concW.calMaxStresses_ai(w=w)
-                        df.loc[i, "tsW"] = tsW
-                        #   1981
-                        _, tsW0, _, _, _, _, _ = concW0.calMaxStresses_ai(w=w)
-                        df.loc[i, "tsW0"] = tsW0
-                        # BCD
-                        (
-                            ns_ai,
-                            ts_ai,
-                            ns_ai_c,
-                            ts_ai_c,
-                            ns_ai_f,
-                            ts_ai_f,
-                            ns,
-                            ts,
-                            ns_fr,
-                            ts_fr,
-                            delta,
-                        ) = conc.calMaxStresses_all(w)
-                        df.loc[i, "ts"] = ts
-                        df.loc[i, "ts_fr"] = ts_fr
-                        df.loc[i, "ts_ai"] = ts_ai
-                        df.loc[i, "ts_ai_c"] = ts_ai_c
-                        df.loc[i, "ts_ai_f"] = ts_ai_f
-                        # mcft
-                        df.loc[i, "ts_mcft"] = vci_mcft(conc.fc, conc.ag, w, pv=1)
-
-                        i += 1
+            df = pg000_f03_cal(conc.data2dict(), ags, pvs, ws, engine)
+            engine_note(engine)
 
             # announcement
             st.success(
@@ -9,6 +9,52 @@ from page_contents.input_components import (
     m_mcft_params,
 )
 from model.r_regression import fit2A, fit2C, test_MonteCarlo
+from page_contents.page_cache import cache_data
+
+
+@cache_data
+def pg001_fit2C(conc_d: dict, fcr, wr, agr, pvr, ntimes, nsets):
+    """fit2C for the concrete conc_d (Conc_AI.data2dict())"""
+    return fit2C(
+        conc=Conc_AI(**conc_d),
+        fcr=fcr,
+        wr=wr,
+        agr=agr,
+        pvr=pvr,
+        ntimes=ntimes,
+        nsets=nsets,
+    )
+
+
+@cache_data
+def pg001_fit2A(conc_d: dict, fcr, wr, agr, pvr, ntimes, nsets, C):
+    """fit2A for the concrete conc_d (Conc_AI.data2dict())"""
+    return fit2A(
+        conc=Conc_AI(**conc_d),
+        fcr=fcr,
+        wr=wr,
+        agr=agr,
+        pvr=pvr,
+        ntimes=ntimes,
+        nsets=nsets,
+        C=C,
+    )
+
+
+@cache_data
+def pg001_test_MonteCarlo(conc_d: dict, wr, agr, pvr, fcr, ntimes, nsets, C, A):
+    """test_MonteCarlo for the concrete conc_d (Conc_AI.data2dict()), figures included"""
+    return test_MonteCarlo(
+        conc=Conc_AI(**conc_d),
+        wr=wr,
+        agr=agr,
+        pvr=pvr,
+        fcr=fcr,
+        ntimes=ntimes,
+        nsets=nsets,
+        C=C,
+        A=A,
+    )
 
 
 def pg001_mc_init():
@@ -37,8 +83,8 @@ def pg001_findC(conc: Conc_AI, ntimes, nsets):
         with st.status(":rainbow[Monte Carlo Simulation]", expanded=True):
             # find C
             wr: tuple = (w1, w2)
-            C, mape, smape, r2 = fit2C(
-                conc=conc, fcr=fcr, wr=wr, agr=agr, pvr=pvr, ntimes=ntimes, nsets=nsets
+            C, mape, smape, r2 = pg001_fit2C(
+                conc.data2dict(), fcr, wr, agr, pvr, ntimes, nsets
             )
             st.write("ntimes", ntimes, ". . nsets", nsets)
             st.write(
@@ -96,15 +142,8 @@ def pg001_findA(conc: Conc_AI, ntimes, nsets):
         with st.status(":rainbow[Monte Carlo Simulation]", expanded=True):
             wr: tuple = (w1, w2)
             C = gC
-            A0, mape0, smape0, r2_0, mape8, smape8, r2_8 = fit2A(
-                conc=conc,
-                fcr=fcr,
-                wr=wr,
-                agr=agr,
-                pvr=pvr,
-                ntimes=ntimes,
-                nsets=nsets,
-                C=C,
+            A0, mape0, smape0, r2_0, mape8, smape8, r2_8 = pg001_fit2A(
+                conc.data2dict(), fcr, wr, agr, pvr, ntimes, nsets, C
             )
             st.write("ntimes", ntimes, ". . nsets", nsets)
             st.write(
@@ -172,16 +211,8 @@ def pg001_MC(conc: Conc_AI, ntimes, nsets):
             C = pC
             A = pA
             # running
-            mape_test, smape_test, r2_test, fig_test, fig2 = test_MonteCarlo(
-                conc=conc,
-                wr=wr,
-                agr=agr,
-                pvr=pvr,
-                fcr=fcr,
-                ntimes=ntimes,
-                nsets=nsets,
-                C=C,
-                A=A,
+            mape_test, smape_test, r2_test, fig_test, fig2 = pg001_test_MonteCarlo(
+                conc.data2dict(), wr, agr, pvr, fcr, ntimes, nsets, C, A
             )
             st.write("ntimes", ntimes, ". . nsets", nsets)
             st.write(
@@ -239,8 +270,8 @@ def pg001_typical_ana(conc: Conc_AI, ntimes, nsets):
         with st.status(":rainbow[Monte Carlo Simulation]", expanded=True):
             # find C
             wr: tuple = (0.005, 0.04)
-            C, mape, smape, r2 = fit2C(
-                conc=conc, fcr=fcr, wr=wr, agr=agr, pvr=pvr, ntimes=ntimes, nsets=nsets
+            C, mape, smape, r2 = pg001_fit2C(
+                conc.data2dict(), fcr, wr, agr, pvr, ntimes, nsets
             )
             st.write("ntimes", ntimes, ". . nsets", nsets)
             st.write(
@@ -270,15 +301,8 @@ def pg001_typical_ana(conc: Conc_AI, ntimes, nsets):
             # find A
             wr = (0.01, 1.6)
             C = 0.5
-            A0, mape0, smape0, r2_0, mape8, smape8, r2_8 = fit2A(
-                conc=conc,
-                fcr=fcr,
-                wr=wr,
-                agr=agr,
-                pvr=pvr,
-                ntimes=ntimes,
-                nsets=nsets,
-                C=C,
+            A0, mape0, smape0, r2_0, mape8, smape8, r2_8 = pg001_fit2A(
+                conc.data2dict(), fcr, wr, agr, pvr, ntimes, nsets, C
             )
             st.write("ntimes", ntimes, ". . nsets", nsets)
             st.write(
@@ -324,16 +348,8 @@ def pg001_typical_ana(conc: Conc_AI, ntimes, nsets):
             C = 0.5
             A = 8
             # running
-            mape_test, smape_test, r2_test, fig_test, fig2 = test_MonteCarlo(
-                conc=conc,
-                wr=wr,
-                agr=agr,
-                pvr=pvr,
-                fcr=fcr,
-                ntimes=ntimes,
-                nsets=nsets,
-                C=C,
-                A=A,
+            mape_test, smape_test, r2_test, fig_test, fig2 = pg001_test_MonteCarlo(
+                conc.data2dict(), wr, agr, pvr, fcr, ntimes, nsets, C, A
             )
             st.write("ntimes", ntimes, ". . nsets", nsets)
             st.write(
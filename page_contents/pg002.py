@@ -4,13 +4,26 @@ from page_contents.input_components import sidebar_m_mcft_params
 from model.bcd_mcft.r_test_data import process_data
 import numpy as np
 import plotly.graph_objects as go
+from page_contents.page_cache import cache_data
+
+
+@cache_data
+def pg002_read_sample() -> pd.DataFrame:
+    """the sample data"""
+    return pd.read_csv("data/data_sample_u8.csv")
+
+
+@cache_data
+def pg002_process_data(df: pd.DataFrame, fA, fB, gC, hE) -> pd.DataFrame:
+    """process_data of the data table df"""
+    return process_data(df=df, fA=fA, fB=fB, gC=gC, hE=hE)
 
 
 def pg002_f00():
     pA, pB, pC, pE = sidebar_m_mcft_params()
 
     """get the data sample format"""
-    df_sample = pd.read_csv("data/data_sample_u8.csv")
+    df_sample = pg002_read_sample()
     vip_cols = ["a", "b", "d", "fc", "Es", "ag", "Ec", "pv", "s_ratio"]
     df0 = df_sample[vip_cols]
     data_name = "sample data"
@@ -69,9 +82,19 @@ def pg002_f00():
             pE,
         )
 
-        df_ret = process_data(df=df, fA=pA, fB=pB, gC=pC, hE=pE)
+        df_ret = pg002_process_data(df, pA, pB, pC, pE)
 
         st.subheader("Result Table", divider="rainbow")
+        report = df_ret.attrs.get("process_data")
+        failed = [i for c in report["chunks"] for i in c["failed"]] if report else []
+        if failed:
+            reasons = [r for c in report["chunks"] for r in c["reasons"]]
+            st.warning(
+                f"{len(failed)} of {len(df_ret)} rows failed, their results are nan"
+            )
+            st.dataframe(
+                pd.DataFrame({"row": failed, "reason": reasons}), hide_index=True
+            )
         st.dataframe(df_ret, hide_index=True)
         # compare with experiment
         if "shear_s_exp" in df_ret.columns:
@@ -0,0 +1,362 @@
+"""
+local HTTP service of the shear predictions of process_data (models m0, m1, m2)
+
+    python -m serve --port 8750 --workers 4 [--batch]
+
+POST /predict   {"beams": [{"a": ..., "b": ..., ...}, ...] or {"a": [...], ...}, "params": {"fA": 8, ...}}
+                or an Arrow IPC stream (Content-Type application/vnd.apache.arrow.stream, needs pyarrow)
+                with the params in the query string (/predict?fA=8&gC=0.5)
+             -> {"rows": [{"m0_theta": ..., ...}, ...], "failed": [positions], "metrics": {...}}
+GET /health, GET /metrics
+
+Concurrent requests are coalesced into micro-batches (up to --max-batch-rows rows, waiting at most
+--max-wait-ms for more) and solved on a pool of --workers processes, off the event loop. A batch waits
+while all the workers are busy, so batches grow with the load
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import parse_qsl, urlsplit
+import numpy as np
+import pandas as pd
+from model.bcd_mcft.r_test_data import (
+    INPUT_COLS,
+    MODEL_NAMES,
+    RESULT_NAMES,
+    process_data,
+)
+
+# the parameters of the m2 model, with their defaults of process_data
+PARAMS = {"fA": 8.0, "fB": 8.0, "gC": 0.5, "hE": 2.0}
+OUTPUT_COLS = tuple(f"{m}_{name}" for m in MODEL_NAMES for name in RESULT_NAMES)
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+MAX_BODY = 64 * 2**20
+
+
+class RequestError(Exception):
+    """a bad request, answered with status 400 (or status)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _predict(cols: dict, params: tuple, batch: bool):
+    """
+    process_data of the beams cols {name: array} in a worker process
+
+    return: {column: array} of OUTPUT_COLS, positions of the failed rows, seconds
+    """
+    start = time.perf_counter()
+    n = len(cols["a"])
+    df = process_data(pd.DataFrame(cols), *params, batch=batch, chunksize=max(n, 1))
+    failed = [i for c in df.attrs["process_data"]["chunks"] for i in c["failed"]]
+    out = {name: df[name].to_numpy() for name in OUTPUT_COLS}
+    return out, failed, time.perf_counter() - start
+
+
+@dataclass
+class _Job:
+    cols: dict
+    params: tuple
+    future: asyncio.Future
+    queued: float = field(default_factory=time.perf_counter)
+
+    def __len__(self):
+        return len(self.cols["a"])
+
+
+class Batcher:
+    """coalesce the submitted beams into micro-batches solved by _predict on executor"""
+
+    def __init__(
+        self,
+        executor,
+        workers: int,
+        max_rows: int = 256,
+        max_wait: float = 0.005,
+        batch: bool = False,
+    ):
+        self.executor = executor
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.batch = batch
+        self.queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(workers)
+        self.counts = {"requests": 0, "rows": 0, "batches": 0}
+        # the running _dispatch tasks, referenced until done (the loop keeps only weak references)
+        self.tasks = set()
+
+    async def submit(self, cols: dict, params: tuple):
+        """solve the beams cols, return the result of _predict for them and metrics"""
+        job = _Job(cols, params, asyncio.get_running_loop().create_future())
+        await self.queue.put(job)
+        return await job.future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self.queue.get()]
+            await self.slots.acquire()
+            # gather more jobs until the batch is full or max_wait has passed
+            deadline = loop.time() + self.max_wait
+            n = len(jobs[0])
+            while n < self.max_rows:
+                try:
+                    job = await asyncio.wait_for(
+                        self.queue.get(), max(deadline - loop.time(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    break
+                jobs.append(job)
+                n += len(job)
+            groups = {}
+            for job in jobs:
+                groups.setdefault(job.params, []).append(job)
+            for i, group in enumerate(groups.values()):
+                if i > 0:
+                    await self.slots.acquire()
+                task = asyncio.create_task(self._dispatch(group))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+    async def _dispatch(self, jobs: list):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        cols = {
+            name: np.concatenate([job.cols[name] for job in jobs])
+            for name in INPUT_COLS
+        }
+        try:
+            out, failed, seconds = await loop.run_in_executor(
+                self.executor, _predict, cols, jobs[0].params, self.batch
+            )
+        except Exception as e:
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+        finally:
+            self.slots.release()
+        self.counts["requests"] += len(jobs)
+        self.counts["rows"] += len(cols["a"])
+        self.counts["batches"] += 1
+        failed = np.asarray(failed, dtype=np.int64)
+        s = 0
+        for job in jobs:
+            e = s + len(job)
+            metrics = {
+                "queue_ms": (start - job.queued) * 1e3,
+                "compute_ms": seconds * 1e3,
+                "batch_rows": len(cols["a"]),
+                "batch_requests": len(jobs),
+            }
+            rets = (
+                {name: v[s:e] for name, v in out.items()},
+                (failed[(failed >= s) & (failed < e)] - s).tolist(),
+                metrics,
+            )
+            if not job.future.done():
+                job.future.set_result(rets)
+            s = e
+
+
+def _parse_json(body: bytes) -> tuple:
+    """beams {name: array} and params of a JSON body"""
+    try:
+        data = json.loads(body)
+        beams = data["beams"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise RequestError(f'the body must be JSON with "beams": {e}')
+    if isinstance(beams, list):
+        beams = {name: [row.get(name) for row in beams] for name in INPUT_COLS}
+    return beams, data.get("params") or {}
+
+
+def _parse_arrow(body: bytes) -> dict:
+    """beams {name: array} of an Arrow IPC stream"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RequestError("Arrow bodies need pyarrow on the server", status=415)
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+    except (pa.ArrowException, ValueError) as e:
+        raise RequestError(f"the body must be an Arrow IPC stream: {e}")
+
+
+def _beams(beams: dict, params: dict) -> tuple:
+    """checked float64 columns of the beams, and the tuple of params"""
+    missing = [name for name in INPUT_COLS if name not in beams]
+    if missing:
+        raise RequestError(f"missing columns: {missing}")
+    try:
+        cols = {name: np.asarray(beams[name], dtype=np.float64) for name in INPUT_COLS}
+        params = {**PARAMS, **{k: float(v) for k, v in params.items()}}
+    except (ValueError, TypeError) as e:
+        raise RequestError(f"values must be numbers: {e}")
+    if len({v.shape for v in cols.values()}) != 1 or cols["a"].ndim != 1:
+        raise RequestError("the columns must be lists of the same length")
+    if len(cols["a"]) == 0:
+        raise RequestError("no beams")
+    if any(np.isnan(v).any() for v in cols.values()):
+        raise RequestError("missing values")
+    unknown = set(params) - set(PARAMS)
+    if unknown:
+        raise RequestError(f"unknown params: {sorted(unknown)}")
+    return cols, tuple(params[k] for k in PARAMS)
+
+
+def _json_value(v: float):
+    return v if math.isfinite(v) else None
+
+
+class Service:
+    """HTTP/1.1 front of a Batcher, on asyncio streams"""
+
+    def __init__(self, batcher: Batcher):
+        self.batcher = batcher
+        self.latencies = []
+
+    async def predict(self, query: dict, headers: dict, body: bytes) -> dict:
+        start = time.perf_counter()
+        if headers.get("content-type", "").startswith(ARROW_TYPE):
+            beams, params = _parse_arrow(body), query
+        else:
+            beams, params = _parse_json(body)
+        cols, params = _beams(beams, params)
+        out, failed, metrics = await self.batcher.submit(cols, params)
+        rows = [
+            {name: _json_value(float(v[i])) for name, v in out.items()}
+            for i in range(len(cols["a"]))
+        ]
+        metrics["total_ms"] = (time.perf_counter() - start) * 1e3
+        self.latencies.append(metrics["total_ms"])
+        del self.latencies[:-10000]
+        return {"rows": rows, "failed": failed, "metrics": metrics}
+
+    def metrics(self) -> dict:
+        counts = self.batcher.counts
+        lat = np.asarray(self.latencies)
+        return {
+            **counts,
+            "mean_batch_rows": counts["rows"] / max(counts["batches"], 1),
+            "latency_ms": {
+                q: float(np.percentile(lat, p)) if len(lat) else None
+                for q, p in (("p50", 50), ("p95", 95), ("p99", 99))
+            },
+        }
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": "body too large"})
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._route(method, target, headers, body)
+                await self._respond(writer, status, payload)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, headers: dict, body: bytes):
+        url = urlsplit(target)
+        try:
+            if method == "POST" and url.path == "/predict":
+                return 200, await self.predict(
+                    dict(parse_qsl(url.query)), headers, body
+                )
+            if method == "GET" and url.path == "/health":
+                return 200, {"status": "ok"}
+            if method == "GET" and url.path == "/metrics":
+                return 200, self.metrics()
+            return 404, {"error": f"no route {method} {url.path}"}
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    @staticmethod
+    async def _respond(writer, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8750,
+    workers: int = 1,
+    max_rows: int = 256,
+    max_wait: float = 0.005,
+    batch: bool = False,
+):
+    """run the service until SIGINT or SIGTERM, then shut the workers down"""
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        batcher = Batcher(executor, workers, max_rows, max_wait, batch)
+        service = Service(batcher)
+        runner = asyncio.create_task(batcher.run())
+        server = await asyncio.start_server(service.handle, host, port)
+        print(f"serving on http://{host}:{port} ({workers} workers)", flush=True)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            runner.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m serve", description="HTTP service of process_data"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8750)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-batch-rows", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument(
+        "--batch", action="store_true", help="batched solvers (solve_batch)"
+    )
+    args = parser.parse_args(argv)
+    asyncio.run(
+        serve(
+            args.host,
+            args.port,
+            args.workers,
+            args.max_batch_rows,
+            args.max_wait_ms / 1e3,
+            args.batch,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
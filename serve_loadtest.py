@@ -0,0 +1,143 @@
+"""
+load test of the HTTP service of serve.py: concurrent clients posting beams of the sample data
+
+    python -m serve_loadtest --clients 16 --requests 20 --rows 4 [--spawn "--workers 2 --batch"]
+
+--spawn starts the service (with those options) for the test and stops it afterwards
+"""
+
+import argparse
+import asyncio
+import json
+import shlex
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from model.bcd_mcft.r_test_data import INPUT_COLS
+
+
+async def _request(reader, writer, method: str, path: str, payload=None) -> dict:
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(
+        (
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode()
+        + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    data = json.loads(await reader.readexactly(length))
+    if status != 200:
+        raise RuntimeError(f"{status}: {data}")
+    return data
+
+
+async def _client(host, port, beams: list, n: int, rows: int, seed: int, out: list):
+    rng = np.random.default_rng(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(n):
+            idx = rng.integers(0, len(beams), rows)
+            payload = {"beams": [beams[j] for j in idx]}
+            start = time.perf_counter()
+            data = await _request(reader, writer, "POST", "/predict", payload)
+            out.append((time.perf_counter() - start, data["metrics"]))
+    finally:
+        writer.close()
+
+
+async def _wait_ready(host, port, timeout: float = 60):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            await _request(reader, writer, "GET", "/health")
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def run(host, port, clients: int, requests: int, rows: int, data: str) -> dict:
+    """run the load test, return its summary"""
+    beams = pd.read_csv(data)[list(INPUT_COLS)].to_dict("records")
+    await _wait_ready(host, port)
+    out = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[
+            _client(host, port, beams, requests, rows, seed, out)
+            for seed in range(clients)
+        ]
+    )
+    seconds = time.perf_counter() - start
+    reader, writer = await asyncio.open_connection(host, port)
+    server = await _request(reader, writer, "GET", "/metrics")
+    writer.close()
+    lat = np.array([t for t, m in out]) * 1e3
+    return {
+        "requests": len(out),
+        "rows": len(out) * rows,
+        "seconds": seconds,
+        "requests_per_s": len(out) / seconds,
+        "rows_per_s": len(out) * rows / seconds,
+        "latency_ms": {
+            q: float(np.percentile(lat, p))
+            for q, p in (("p50", 50), ("p95", 95), ("p99", 99))
+        },
+        "mean_batch_rows": float(np.mean([m["batch_rows"] for t, m in out])),
+        "server": server,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m serve_loadtest", description="load test of serve.py"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8750)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="per client")
+    parser.add_argument("--rows", type=int, default=4, help="beams per request")
+    parser.add_argument("--data", default="data/data_sample_u8.csv")
+    parser.add_argument(
+        "--spawn",
+        metavar="OPTIONS",
+        help='start "python -m serve OPTIONS" for the test',
+    )
+    args = parser.parse_args(argv)
+    proc = None
+    if args.spawn is not None:
+        cmd = [sys.executable, "-m", "serve", "--host", args.host]
+        cmd += ["--port", str(args.port)] + shlex.split(args.spawn)
+        proc = subprocess.Popen(cmd, stdout=sys.stderr)
+    try:
+        summary = asyncio.run(
+            run(
+                args.host,
+                args.port,
+                args.clients,
+                args.requests,
+                args.rows,
+                args.data,
+            )
+        )
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
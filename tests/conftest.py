@@ -0,0 +1,10 @@
+import pytest
+import model.r_dataset_cache as dataset_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """a dataset cache of the test, out of the home directory"""
+    folder = tmp_path / "dataset_cache"
+    monkeypatch.setattr(dataset_cache, "CACHE_DIR", str(folder))
+    return folder
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from model.r_ai_n import f, supf, umax, g1, g2, g3, g4
+from model.r_ai_n import f_np, supf_np, umax_np, g1_np, g2_np, g3_np, g4_np
+
+EPS = np.finfo(np.float64).eps
+N = 20000
+
+
+def _points():
+    """random (d, w, delta) and af, the degenerate d = 0, w = 0, delta = 0 included"""
+    rng = np.random.default_rng(5)
+    d = rng.uniform(0, 32, N)
+    w = rng.uniform(0, 2, N)
+    delta = rng.uniform(0, 2, N)
+    af = rng.choice([4.75, 10, 20, 32], N)
+    d[:100], w[100:200], delta[100:150] = 0, 0, 0
+    return d, w, delta, af
+
+
+def _scalar(func, *args) -> np.ndarray:
+    out = []
+    for x in zip(*[a.tolist() for a in args]):
+        try:
+            out.append(func(*x))
+        except ZeroDivisionError:
+            out.append(0.0)
+    return np.array(out, dtype=np.float64)
+
+
+@pytest.mark.parametrize(
+    "func, func_np",
+    [(supf, supf_np), (umax, umax_np), (g1, g1_np), (g3, g3_np)],
+)
+def test_kernels_bit_identical(func, func_np):
+    d, w, delta, af = _points()
+    np.testing.assert_array_equal(func_np(d, w, delta), _scalar(func, d, w, delta))
+
+
+def test_f_bit_identical():
+    d, w, delta, af = _points()
+    np.testing.assert_array_equal(f_np(d, af), _scalar(f, d, af))
+
+
+@pytest.mark.parametrize("func, func_np", [(g2, g2_np), (g4, g4_np)])
+def test_arcsin_kernels_within_4_ulp_of_their_arcsin_terms(func, func_np):
+    # NumPy's arcsin and math.asin may differ by 1 ulp, the terms d^2 asin(.) / 4 / d^3 are <= pi / (8 d)
+    d, w, delta, af = _points()
+    v, ref = func_np(d, w, delta), _scalar(func, d, w, delta)
+    with np.errstate(divide="ignore"):
+        tol = np.where(d > 0, 4 * EPS * np.pi / (8 * d), 0)
+    assert np.all(np.abs(v - ref) <= tol)
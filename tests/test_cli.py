@@ -0,0 +1,31 @@
+import pytest
+from cli import _conc
+
+
+def test_conc_keeps_fractional_values():
+    conc = _conc(["pv=0.5", "ag=16.5", "fc=45.7", "pvf=0.25", "FACTOR_shape=1.23"])
+    assert (conc.pv, conc.ag, conc.fc, conc.pvf, conc.FACTOR_shape) == (
+        0.5,
+        16.5,
+        45.7,
+        0.25,
+        1.23,
+    )
+
+
+def test_conc_config_and_command_line():
+    # [conc] of a config file, then --conc
+    conc = _conc([{"pv": 0.5, "fc": 60}, "ag=12.5"])
+    assert (conc.pv, conc.fc, conc.ag) == (0.5, 60.0, 12.5)
+    assert isinstance(conc.fc, float)
+
+
+def test_conc_selectors_are_ints():
+    conc = _conc(["sig_puCalType=2", "axyCalType=1"])
+    assert conc.sig_puCalType == 2 and isinstance(conc.sig_puCalType, int)
+    assert conc.axyCalType == 1 and isinstance(conc.axyCalType, int)
+
+
+def test_conc_unknown_parameter():
+    with pytest.raises(ValueError, match="unknown parameters"):
+        _conc(["xx=1"])
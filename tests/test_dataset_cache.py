@@ -0,0 +1,16 @@
+import numpy as np
+from model.r_ai_n import Conc_AI
+from model.r_regression import _genMonteCarlo
+
+
+def test_cache_is_opt_in(cache_dir):
+    _genMonteCarlo(Conc_AI(), ntimes=1, nsets=5)
+    assert not cache_dir.exists()
+
+
+def test_cache_reuses_the_dataset(cache_dir):
+    X, y = _genMonteCarlo(Conc_AI(), ntimes=1, nsets=5, cache=True)
+    assert len(list(cache_dir.iterdir())) == 1
+    X2, y2 = _genMonteCarlo(Conc_AI(), ntimes=1, nsets=5, cache=True)
+    np.testing.assert_array_equal(X2, X)
+    np.testing.assert_array_equal(y2, y)
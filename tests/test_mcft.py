@@ -0,0 +1,41 @@
+import itertools
+import numpy as np
+import model.bcd_mcft.r_coreF_bcdMCFT as cF
+from model.bcd_mcft.r_beam import *
+from model.bcd_mcft.r_test_data import _models
+
+# n_ex2all stops at |l - r| / min(l, r) < EPS_TOR, which leaves e1 within ~4 EPS_TOR of the root of Eq.23_n
+E1_TOL = 5 * cF.Const.EPS_TOR
+
+
+def _n_ex2all_calls(monkeypatch) -> list:
+    """((f, g, h, sx, ex), (e1, theta, beta)) of the n_ex2all calls of NMdl_bcdMCFT on a few beams"""
+    calls = []
+    n_ex2all = cF.n_ex2all
+
+    def record(*args, **kwargs):
+        ret = n_ex2all(*args, **kwargs)
+        calls.append((args, ret))
+        return ret
+
+    monkeypatch.setattr(cF, "n_ex2all", record)
+    for d, a_d, fc, s_ratio, pv in itertools.product(
+        (250, 1000), (2.5, 5), (25, 80), (0.008, 0.025), (0.3, 1)
+    ):
+        geo = Geometry(a_d * d, 300, d)
+        mat = Material(fc, 200000, s_ratio, 20, 4700 * np.sqrt(fc))
+        cls, r_setting = _models(pv)[2]
+        cls(geo, mat, FactorSetting(), r_setting).getShearStrength_S()
+    return calls
+
+
+def test_n_theta_e1_at_the_n_ex2all_roots(monkeypatch):
+    """the cubic of Eq.23_n at the theta of n_ex2all gives back its e1, as float and as arrays"""
+    calls = _n_ex2all_calls(monkeypatch)
+    assert len(calls) > 100
+    args = np.array([a for a, _ in calls], dtype=np.float64)
+    e1, theta, _ = np.array([r for _, r in calls], dtype=np.float64).T
+    e1_cubic = np.array([cF.n_theta_e1(*a, t) for a, t in zip(args[:, :4], theta)])
+    e1_np = cF.n_theta_e1_np(*args[:, :4].T, theta)
+    np.testing.assert_allclose(e1_cubic, e1, rtol=E1_TOL)
+    np.testing.assert_allclose(e1_np, e1_cubic, rtol=1e-12)
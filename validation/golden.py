@@ -0,0 +1,437 @@
+"""
+golden values of the reference implementation, to validate the accelerated engines against
+
+    python -m validation.golden record                 (re)write the fixture validation/golden.npz
+    python -m validation.golden check [-e CASE:ENGINE] [--worst N]
+
+record evaluates the reference code (scipy quad Conc_AI.calStresses_all and calMaxStresses_all,
+getShearStrength_S of the models m0, m1, m2 of process_data, np.roots for the largest root of a cubic)
+on the stratified grids of GRIDS.
+check evaluates every engine of ENGINES on the inputs of the fixture, compares each output with
+|value - golden| <= atol + rtol * |golden| (TOLERANCES), prints the worst points and exits with 1 on failure
+"""
+
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+from model.r_ai_n import Conc_AI, STRESS_NAMES
+from model.r_ai_table import AI_MaxTable, MAX_NAMES
+from model.bcd_mcft.r_beam import *
+from model.bcd_mcft.r_mdl_bcdMCFT import *
+import model.bcd_mcft.r_coreF_bcdMCFT as cF
+from model.bcd_mcft.r_eng_support import cubic_max_root
+from model.bcd_mcft.r_test_data import MODEL_NAMES, _models
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden.npz")
+
+# levels of the parameters of each case, the fixture holds every combination
+GRIDS = {
+    "stresses": {
+        "fc": (20, 40, 80, 140),
+        "ag": (10, 16, 20, 32),
+        "pv": (0.2, 0.6, 1),
+        "w": (0.05, 0.2, 0.6, 1.2),
+        "delta": (0.05, 0.3, 1, 2),
+    },
+    "max_stresses": {
+        "fc": (20, 40, 80, 140),
+        "ag": (10, 16, 20, 32),
+        "pv": (0.2, 0.6, 1),
+        "w": (0.01, 0.05, 0.2, 0.5, 1, 1.6),
+    },
+    "mcft": {
+        "d": (250, 500, 1000),
+        "a_d": (2.5, 3.5, 5),
+        "fc": (25, 45, 80),
+        "s_ratio": (0.008, 0.015, 0.025),
+        "ag": (10, 20, 32),
+        "pv": (0.3, 0.7, 1),
+    },
+    # a.x^3 + b.x^2 + c.x + d, signs and scales of n_theta_e1 (k3, k2, -sqrt(500), k0) and beyond,
+    # |a| << |b| included
+    "cubic": {
+        "a": (-1, -2.86e-2, 1e-6, 2.86e-2, 1, 30),
+        "b": (-259, -1, 0, 0.5, 259),
+        "c": (-22.4, -3.9e-3, 0, 2),
+        "d": (-1, 0, 3.86e-4, 5),
+    },
+}
+# results of getShearStrength_S, the outputs of "mcft" are "<model>_<result>"
+MCFT_RESULTS = ("vc_s", "beta", "e1", "theta", "ex")
+BEAM_B = 300
+BEAM_ES = 200000
+
+
+def _grid(levels: dict) -> dict:
+    """{name: flat array} of all the combinations of levels, the last name varying fastest"""
+    grid = np.meshgrid(
+        *[np.asarray(v, dtype=np.float64) for v in levels.values()], indexing="ij"
+    )
+    return {name: g.ravel() for name, g in zip(levels, grid)}
+
+
+def _beams(pts: dict) -> tuple:
+    """Geometry and Material (of arrays) of the beams of the "mcft" grid"""
+    geo = Geometry(
+        a=pts["a_d"] * pts["d"], b=np.full_like(pts["d"], BEAM_B), d=pts["d"]
+    )
+    mat = Material(
+        fc=pts["fc"],
+        e_s=np.full_like(pts["fc"], BEAM_ES),
+        steel_ratio=pts["s_ratio"],
+        ag=pts["ag"],
+        e_c=4700 * np.sqrt(pts["fc"]),
+    )
+    return geo, mat
+
+
+def _scalar(conc: Conc_AI, pts: dict, method: str, names: tuple) -> dict:
+    """{name: array} of the scalar method of conc (calStresses_all or calMaxStresses_all) point by point"""
+    n = len(pts["w"])
+    out = np.empty((len(names), n))
+    args = [k for k in ("w", "delta") if k in pts]
+    for i in range(n):
+        conc.fc, conc.ag, conc.pv = pts["fc"][i], pts["ag"][i], pts["pv"][i]
+        out[:, i] = getattr(conc, method)(*[pts[k][i] for k in args])
+    return dict(zip(names, out))
+
+
+def _mcft_rows(pts: dict, change: dict = None, models=MODEL_NAMES) -> dict:
+    """
+    {"<model>_<result>": array} of getShearStrength_S beam by beam, nan where it fails
+    >> change: fields of the run settings to replace, e.g. {"e1_solver": "illinois"}
+    """
+    geo, mat = _beams(pts)
+    n = len(pts["d"])
+    out = {f"{m}_{r}": np.full(n, np.nan) for m in models for r in MCFT_RESULTS}
+    factors = FactorSetting()
+    for i in range(n):
+        g = Geometry(geo.a[i], geo.b[i], geo.d[i])
+        m = Material(mat.fc[i], mat.e_s[i], mat.steel_ratio[i], mat.ag[i], mat.e_c[i])
+        for name, (cls, r_setting) in zip(MODEL_NAMES, _models(pts["pv"][i])):
+            if name not in models:
+                continue
+            if change:
+                r_setting = replace(r_setting, **change)
+            try:
+                rets = cls(g, m, factors, r_setting).getShearStrength_S()
+            except (cF.SolverError, ArithmeticError, ValueError):
+                continue
+            for r, v in zip(MCFT_RESULTS, rets):
+                out[f"{name}_{r}"][i] = v
+    return out
+
+
+def _mcft_batch(pts: dict) -> dict:
+    """{"<model>_<result>": array} of solve_batch"""
+    geo, mat = _beams(pts)
+    out = {}
+    for name, (cls, r_setting) in zip(MODEL_NAMES, _models(pts["pv"])):
+        rets = cls.solve_batch(geo, mat, r_setting)
+        out.update((f"{name}_{r}", v) for r, v in zip(MCFT_RESULTS, rets))
+    return out
+
+
+def _roots_max(pts: dict) -> dict:
+    """{"x": array} of the largest real root of np.roots cubic by cubic, nan if there is none"""
+    x = np.full(len(pts["a"]), np.nan)
+    for i, k in enumerate(zip(pts["a"], pts["b"], pts["c"], pts["d"])):
+        rs = np.roots(k)
+        rs = rs.real[np.abs(rs.imag) <= 1e-7 * np.maximum(np.abs(rs), 1)]
+        if len(rs):
+            x[i] = rs.max()
+    return {"x": x}
+
+
+def _max_table(pts: dict) -> dict:
+    """{name: array} of an AI_MaxTable whose nodes are not those of the grid, w nodes denser at small w"""
+    table = AI_MaxTable.build(
+        Conc_AI(),
+        {
+            "fc": (15, 145, 14),
+            "ag": (9, 33, 13),
+            "pv": (0.2, 1, 2),
+            "w": np.geomspace(0.005, 1.605, 81),
+        },
+    )
+    rets = table.calMaxStresses_all(
+        w=pts["w"], fc=pts["fc"], ag=pts["ag"], pv=pts["pv"]
+    )
+    return dict(zip(MAX_NAMES, rets))
+
+
+# the reference implementation of each case
+REFERENCES = {
+    "stresses": lambda pts: _scalar(
+        Conc_AI(axyCalType=0), pts, "calStresses_all", STRESS_NAMES
+    ),
+    "max_stresses": lambda pts: _scalar(
+        Conc_AI(axyCalType=0), pts, "calMaxStresses_all", MAX_NAMES
+    ),
+    "mcft": _mcft_rows,
+    "cubic": _roots_max,
+}
+
+# the engines to validate: {case: {engine: function of the inputs -> {output: array}}},
+# an engine may return only some of the outputs of its case
+ENGINES = {
+    "stresses": {
+        "gl": lambda pts: _scalar(
+            Conc_AI(axyCalType=1), pts, "calStresses_all", STRESS_NAMES
+        ),
+        "np": lambda pts: dict(
+            zip(
+                STRESS_NAMES,
+                Conc_AI().calStresses_all_np(
+                    w=pts["w"],
+                    delta=pts["delta"],
+                    ag=pts["ag"],
+                    pv=pts["pv"],
+                    fc=pts["fc"],
+                ),
+            )
+        ),
+    },
+    "max_stresses": {
+        "gl": lambda pts: _scalar(
+            Conc_AI(axyCalType=1), pts, "calMaxStresses_all", MAX_NAMES
+        ),
+        "np": lambda pts: dict(
+            zip(
+                MAX_NAMES,
+                Conc_AI().calMaxStresses_all_np(
+                    w=pts["w"], ag=pts["ag"], pv=pts["pv"], fc=pts["fc"]
+                ),
+            )
+        ),
+        "table": _max_table,
+    },
+    "mcft": {
+        "batch": _mcft_batch,
+        "illinois": lambda pts: _mcft_rows(
+            pts, {"e1_solver": "illinois"}, ("m0", "m1")
+        ),
+        "aitken": lambda pts: _mcft_rows(pts, {"ex_accel": "aitken"}, ("m2",)),
+        "anderson": lambda pts: _mcft_rows(pts, {"ex_accel": "anderson"}, ("m2",)),
+    },
+    "cubic": {
+        "np": lambda pts: {"x": cubic_max_root(pts["a"], pts["b"], pts["c"], pts["d"])},
+        "scalar": lambda pts: {
+            "x": np.array(
+                [
+                    cubic_max_root(*k)
+                    for k in zip(pts["a"], pts["b"], pts["c"], pts["d"])
+                ]
+            )
+        },
+    },
+}
+
+# (rtol, atol) of each engine: {(case, engine): {output or "*": (rtol, atol)}}, "*" for the other outputs.
+# Stresses are in MPa, delta in mm. The Gauss-Legendre engines differ from quad by ~5e-6 MPa (the error
+# of quad), the table by its interpolation error, and the MCFT solvers by their stop criterion
+# (eps_tolerance = 1e-3 on ex). The cubic roots agree with np.roots to its own accuracy
+_GL = {"*": (1e-4, 1e-5)}
+_MCFT = {"*": (3e-3, 1e-9)}
+TOLERANCES = {
+    ("stresses", "gl"): _GL,
+    ("stresses", "np"): _GL,
+    ("max_stresses", "gl"): {"*": (1e-5, 1e-6)},
+    ("max_stresses", "np"): {"*": (1e-5, 1e-6)},
+    ("max_stresses", "table"): {"*": (2e-2, 1e-2), "delta": (1e-2, 1e-3)},
+    ("mcft", "batch"): _MCFT,
+    ("mcft", "illinois"): _MCFT,
+    ("mcft", "aitken"): _MCFT,
+    ("mcft", "anderson"): _MCFT,
+    ("cubic", "np"): {"*": (1e-9, 1e-12)},
+    ("cubic", "scalar"): {"*": (1e-9, 1e-12)},
+}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record(path: str = FIXTURE, cases=None) -> dict:
+    """
+    evaluate the references on GRIDS and save them to path (.npz), arrays "<case>.<name>"
+    of the inputs and outputs, and "meta" (JSON): the names of each case, the reference Conc_AI, versions
+
+    return: the fixture as load() returns it
+    """
+    cases = list(GRIDS) if cases is None else cases
+    arrays, meta = {}, {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "numpy": np.__version__,
+        "conc": Conc_AI().data2dict(),
+        "cases": {},
+    }
+    for case in cases:
+        pts = _grid(GRIDS[case])
+        outputs = REFERENCES[case](pts)
+        meta["cases"][case] = {"inputs": list(pts), "outputs": list(outputs)}
+        for name, v in {**pts, **outputs}.items():
+            arrays[f"{case}.{name}"] = np.asarray(v, dtype=np.float64)
+    np.savez_compressed(path, meta=json.dumps(meta), **arrays)
+    return load(path)
+
+
+def load(path: str = FIXTURE) -> dict:
+    """the fixture {"meta": dict, case: {"inputs": {name: array}, "outputs": {name: array}}}"""
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        fixture = {"meta": meta}
+        for case, names in meta["cases"].items():
+            fixture[case] = {
+                kind: {name: data[f"{case}.{name}"] for name in names[kind]}
+                for kind in ("inputs", "outputs")
+            }
+    return fixture
+
+
+def _tolerance(case: str, engine: str, output: str) -> tuple:
+    tols = TOLERANCES[(case, engine)]
+    return tols.get(output, tols["*"])
+
+
+def compare(golden: dict, values: dict, rtol: float, atol: float) -> dict:
+    """
+    compare the arrays values with golden: a point fails if |value - golden| > atol + rtol * |golden|,
+    or if only one of them is nan. ratio is the error over the tolerance (inf where only one is nan)
+
+    return: {"abs": errors, "rel": errors / |golden|, "ratio", "fail": bool array}
+    """
+    golden, values = np.asarray(golden), np.asarray(values)
+    err = np.abs(values - golden)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = err / np.abs(golden)
+        ratio = err / (atol + rtol * np.abs(golden))
+    both = np.isnan(golden) & np.isnan(values)
+    one = np.isnan(golden) != np.isnan(values)
+    err[both], rel[both], ratio[both] = 0, 0, 0
+    err[one], rel[one], ratio[one] = np.inf, np.inf, np.inf
+    rel[~np.isfinite(rel) & ~one] = 0
+    return {"abs": err, "rel": rel, "ratio": ratio, "fail": ratio > 1}
+
+
+def check(path: str = FIXTURE, engines=None, worst: int = 5) -> tuple:
+    """
+    validate the engines ["case:engine", ...] (all of ENGINES by default) against the fixture
+
+    return: summary DataFrame (one row per case, engine, output: n, n_fail, max_abs, max_rel, max_ratio,
+            rtol, atol), DataFrame of the worst points of each output (largest ratio, inputs included)
+    """
+    fixture = load(path)
+    if engines is None:
+        engines = [f"{c}:{e}" for c in ENGINES for e in ENGINES[c] if c in fixture]
+    summary, points = [], []
+    for item in engines:
+        case, _, engine = item.partition(":")
+        if case not in fixture or engine not in ENGINES.get(case, {}):
+            raise ValueError(f"unknown engine {item}, see ENGINES and the fixture")
+        inputs, golden = fixture[case]["inputs"], fixture[case]["outputs"]
+        values = ENGINES[case][engine](inputs)
+        for output, v in values.items():
+            rtol, atol = _tolerance(case, engine, output)
+            cmp = compare(golden[output], v, rtol, atol)
+            summary.append(
+                {
+                    "case": case,
+                    "engine": engine,
+                    "output": output,
+                    "n": len(v),
+                    "n_fail": int(cmp["fail"].sum()),
+                    "max_abs": float(cmp["abs"].max()),
+                    "max_rel": float(cmp["rel"].max()),
+                    "max_ratio": float(cmp["ratio"].max()),
+                    "rtol": rtol,
+                    "atol": atol,
+                }
+            )
+            for i in np.argsort(-cmp["ratio"], kind="stable")[:worst]:
+                points.append(
+                    {
+                        "case": case,
+                        "engine": engine,
+                        "output": output,
+                        "ratio": float(cmp["ratio"][i]),
+                        "golden": float(golden[output][i]),
+                        "value": float(v[i]),
+                        **{name: float(a[i]) for name, a in inputs.items()},
+                    }
+                )
+    return pd.DataFrame(summary), pd.DataFrame(points)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m validation.golden",
+        description="golden values of the reference implementation",
+    )
+    parser.add_argument("command", choices=("record", "check"))
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument(
+        "-e",
+        "--engine",
+        action="append",
+        metavar="CASE:ENGINE",
+        help="engine to check, repeatable (default all)",
+    )
+    parser.add_argument("--case", action="append", help="case to record (default all)")
+    parser.add_argument("--worst", type=int, default=3, help="worst points per output")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        fixture = record(args.fixture, args.case)
+        for case, data in fixture.items():
+            if case != "meta":
+                n = len(next(iter(data["inputs"].values())))
+                n_nan = sum(int(np.isnan(v).sum()) for v in data["outputs"].values())
+                print(
+                    f"{case}: {n} points, {len(data['outputs'])} outputs, {n_nan} nan"
+                )
+        print(f"saved to {args.fixture} ({os.path.getsize(args.fixture)} bytes)")
+        return 0
+
+    try:
+        summary, points = check(args.fixture, args.engine, args.worst)
+    except ValueError as e:
+        parser.error(str(e))
+    failed = summary[summary["n_fail"] > 0]
+    if len(failed):
+        title = "worst points of the failed outputs"
+        keys = set(zip(failed["case"], failed["engine"], failed["output"]))
+        rows = [
+            k in keys for k in zip(points["case"], points["engine"], points["output"])
+        ]
+        worst = points[rows]
+    else:
+        title = "worst points of each engine"
+        worst = points.sort_values("ratio", ascending=False, kind="stable")
+        worst = worst.groupby(["case", "engine"], sort=False).head(args.worst)
+    with pd.option_context("display.width", 200, "display.max_rows", None):
+        print(summary.to_string(index=False))
+        for case, df in worst.groupby("case", sort=False):
+            print(f"\n{title} ({case}):")
+            print(df.dropna(axis=1, how="all").to_string(index=False))
+    print(f"\n{len(failed)} of {len(summary)} outputs out of tolerance")
+    return 1 if len(failed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())